@@ -1,8 +1,9 @@
 // ===========================
 // State Management
 // ===========================
-let allInternships = [];
-let filteredInternships = [];
+let table = null;                     // columnar listings, see buildTable()
+let filteredRows = new Int32Array(0); // matching row numbers in sort order
+let searchIndex = null;
 
 // ===========================
 // DOM Elements
@@ -12,6 +13,7 @@ const elements = {
     clearBtn: document.getElementById('clearBtn'),
     typeFilter: document.getElementById('typeFilter'),
     locationFilter: document.getElementById('locationFilter'),
+    skillFilter: document.getElementById('skillFilter'),
     sortBy: document.getElementById('sortBy'),
     resetFilters: document.getElementById('resetFilters'),
     internshipsGrid: document.getElementById('internshipsGrid'),
@@ -21,6 +23,7 @@ const elements = {
     resultsInfo: document.getElementById('resultsInfo'),
     resultsCount: document.getElementById('resultsCount'),
     totalCount: document.getElementById('totalCount'),
+    addedToday: document.getElementById('addedToday'),
     lastUpdated: document.getElementById('lastUpdated')
 };
 
@@ -76,6 +79,25 @@ async function loadInternships() {
         elements.errorState.style.display = 'none';
         elements.emptyState.style.display = 'none';
         
+        // Columnar export with prebuilt sort orders and facet row lists
+        const listingsResponse = await fetch('data/listings.json');
+        
+        if (listingsResponse.ok) {
+            const data = await listingsResponse.json();
+            elements.totalCount.textContent = data.totalInternships || 0;
+            elements.lastUpdated.textContent = formatDate(data.lastUpdated);
+            setTable(data);
+            return;
+        }
+        
+        const manifestResponse = await fetch('data/manifest.json');
+        
+        if (manifestResponse.ok) {
+            await loadShards(await manifestResponse.json());
+            return;
+        }
+        
+        // Fall back to the single-file export
         const response = await fetch('data/internships.json');
         
         if (!response.ok) {
@@ -84,16 +106,11 @@ async function loadInternships() {
         
         const data = await response.json();
         
-        allInternships = data.internships || [];
-        filteredInternships = [...allInternships];
-        
         // Update header stats
         elements.totalCount.textContent = data.totalInternships || 0;
         elements.lastUpdated.textContent = formatDate(data.lastUpdated);
         
-        elements.loadingState.style.display = 'none';
-        
-        applyFilters();
+        setTable(columnarFromInternships(data.internships || []));
         
     } catch (error) {
         console.error('Error loading internships:', error);
@@ -102,76 +119,326 @@ async function loadInternships() {
     }
 }
 
+// Shards are listed newest month first: render as soon as the first one
+// arrives, then fetch the older months one at a time in the background
+// and rebuild the table once they have all loaded.
+async function loadShards(manifest) {
+    const shards = manifest.shards || [];
+    
+    elements.totalCount.textContent = manifest.totalInternships || 0;
+    elements.lastUpdated.textContent = formatDate(manifest.lastUpdated);
+    
+    const internships = [];
+    
+    for (const [index, shard] of shards.entries()) {
+        const response = await fetch(`data/shards/${shard.file}`);
+        
+        if (!response.ok) {
+            throw new Error(`Failed to fetch shard ${shard.file}`);
+        }
+        
+        for (const internship of await response.json()) {
+            internships.push(internship);
+        }
+        if (index === 0) {
+            setTable(columnarFromInternships(internships));
+        }
+    }
+    
+    if (shards.length !== 1) {
+        setTable(columnarFromInternships(internships));
+    }
+}
+
+function setTable(data) {
+    table = buildTable(data);
+    elements.loadingState.style.display = 'none';
+    applyFilters();
+}
+
+// Index a listings.json payload: sort orders become typed arrays and the
+// type / WFH row lists are expanded to per-row lookups for the cards
+function buildTable(data) {
+    const columns = data.columns;
+    const count = columns.id.length;
+    const sorts = {};
+    Object.entries(data.sorts).forEach(([key, rows]) => {
+        sorts[key] = Int32Array.from(rows);
+    });
+    
+    const types = new Array(count).fill(null);
+    Object.entries(data.facets.type).forEach(([type, rows]) => {
+        rows.forEach(row => { types[row] = type || null; });
+    });
+    const workFromHome = new Uint8Array(count);
+    data.facets.workFromHome.forEach(row => { workFromHome[row] = 1; });
+    
+    return {
+        count,
+        columns,
+        sorts,
+        typeRows: data.facets.type,
+        wfhRows: data.facets.workFromHome,
+        types,
+        workFromHome,
+        rowById: new Map(columns.id.map((id, row) => [id, row])),
+        searchText: null
+    };
+}
+
+// Same layout as the Python columnar export, for the shard and
+// single-file fallbacks; the sorts are computed once per load
+function columnarFromInternships(internships) {
+    const columns = {};
+    ['id', 'title', 'company', 'logo', 'duration', 'location', 'skills', 'deadline',
+     'url', 'views', 'registrations', 'scrapedAt', 'firstSeen'].forEach(field => {
+        columns[field] = internships.map(internship => internship[field]);
+    });
+    columns.stipendMin = internships.map(internship => internship.stipend?.min ?? null);
+    columns.stipendMax = internships.map(internship => internship.stipend?.max ?? null);
+    columns.currency = internships.map(internship => internship.stipend?.currency ?? null);
+    
+    const type = {};
+    const workFromHome = [];
+    internships.forEach((internship, row) => {
+        (type[internship.type || ''] ||= []).push(row);
+        if (internship.workFromHome) workFromHome.push(row);
+    });
+    
+    const descending = values => Array.from(values.keys()).sort((a, b) => values[b] - values[a] || a - b);
+    const sorts = {
+        'recent': descending(internships.map(i => new Date(i.scrapedAt).getTime() || 0)),
+        'stipend-high': descending(internships.map(i => i.stipend?.max || i.stipend?.min || 0)),
+        'views': descending(internships.map(i => i.views || 0)),
+        'registrations': descending(internships.map(i => i.registrations || 0))
+    };
+    
+    return { columns, sorts, facets: { type, workFromHome } };
+}
+
+// Listing object for one row, in the shape createInternshipCard expects
+function rowItem(row) {
+    const c = table.columns;
+    const min = c.stipendMin[row];
+    const max = c.stipendMax[row];
+    return {
+        id: c.id[row],
+        title: c.title[row],
+        company: c.company[row],
+        logo: c.logo[row],
+        type: table.types[row],
+        stipend: min || max ? { min, max, currency: c.currency[row] } : null,
+        duration: c.duration[row],
+        location: c.location[row],
+        workFromHome: table.workFromHome[row] === 1,
+        skills: c.skills[row] || [],
+        deadline: c.deadline[row],
+        url: c.url[row],
+        views: c.views[row],
+        registrations: c.registrations[row],
+        scrapedAt: c.scrapedAt[row],
+        firstSeen: c.firstSeen[row]
+    };
+}
+
+// Header stats come from the small precomputed stats.json so they show
+// before any listing data has downloaded
+async function loadStats() {
+    try {
+        const response = await fetch('data/stats.json');
+        if (!response.ok) return;
+        
+        const stats = await response.json();
+        elements.totalCount.textContent = stats.total_internships || 0;
+        elements.addedToday.textContent = stats.added_today || 0;
+        elements.lastUpdated.textContent = formatDate(stats.lastUpdated);
+        
+        const facets = stats.facets || {};
+        addFacetOptions(elements.locationFilter, facets.locations);
+        addFacetOptions(elements.skillFilter, facets.skills);
+    } catch (error) {
+        console.warn('Stats unavailable:', error);
+    }
+}
+
+// Fill a filter dropdown from precomputed {name: count} facet counts
+function addFacetOptions(select, counts) {
+    Object.entries(counts || {}).forEach(([name, count]) => {
+        const option = document.createElement('option');
+        option.value = name;
+        option.textContent = `${name} (${count})`;
+        select.appendChild(option);
+    });
+}
+
+// ===========================
+// Search Index
+// ===========================
+async function loadSearchIndex() {
+    try {
+        const response = await fetch('data/search-index.json');
+        if (!response.ok) return;
+        
+        const data = await response.json();
+        searchIndex = {
+            ids: data.ids,
+            terms: data.terms,
+            vocabulary: Object.keys(data.terms).sort()
+        };
+    } catch (error) {
+        console.warn('Search index unavailable, using full scan:', error);
+    }
+}
+
+// Same tokenization as the Python exporter: lowercase letter/digit runs
+function tokenize(text) {
+    return text.toLowerCase().match(/[\p{L}\p{N}]+/gu) || [];
+}
+
+// Returns the Set of matching ids (every word must prefix-match a term),
+// or null when no index is loaded
+function searchIds(searchTerm) {
+    if (!searchIndex) return null;
+    
+    const tokens = tokenize(searchTerm);
+    if (tokens.length === 0) return null;
+    
+    const { vocabulary, terms, ids } = searchIndex;
+    let matches = null;
+    
+    for (const token of tokens) {
+        // Binary search for the first term >= token, then walk the prefix range
+        let lo = 0;
+        let hi = vocabulary.length;
+        while (lo < hi) {
+            const mid = (lo + hi) >> 1;
+            if (vocabulary[mid] < token) lo = mid + 1;
+            else hi = mid;
+        }
+        
+        const positions = new Set();
+        for (let i = lo; i < vocabulary.length && vocabulary[i].startsWith(token); i++) {
+            terms[vocabulary[i]].forEach(position => positions.add(position));
+        }
+        
+        matches = matches === null
+            ? positions
+            : new Set([...matches].filter(position => positions.has(position)));
+        if (matches.size === 0) break;
+    }
+    
+    return new Set([...matches].map(position => ids[position]));
+}
+
 // ===========================
 // Filtering & Sorting
 // ===========================
+// Filters narrow a per-row mask, cheapest first (prebuilt row lists, then
+// the search index, then column scans over the remaining rows); the
+// prebuilt order for the sort option is then walked once. Nothing is
+// re-sorted and no listing objects are created.
 function applyFilters() {
+    if (!table) return;
+    
     const searchTerm = elements.searchInput.value.toLowerCase().trim();
     const typeFilter = elements.typeFilter.value;
     const locationFilter = elements.locationFilter.value;
+    const skillFilter = elements.skillFilter.value;
     const sortBy = elements.sortBy.value;
+    const { count, columns } = table;
     
-    // Filter
-    filteredInternships = allInternships.filter(internship => {
-        // Search filter
-        if (searchTerm) {
-            const searchableText = [
-                internship.title,
-                internship.company,
-                internship.location,
-                ...(internship.skills || [])
-            ].join(' ').toLowerCase();
-            
-            if (!searchableText.includes(searchTerm)) {
-                return false;
-            }
+    let mask = null;
+    const keepRows = rows => {
+        const next = new Uint8Array(count);
+        for (const row of rows) {
+            if (!mask || mask[row]) next[row] = 1;
         }
-        
-        // Type filter
-        if (typeFilter && internship.type !== typeFilter) {
-            return false;
+        mask = next;
+    };
+    const keepWhere = predicate => {
+        const next = new Uint8Array(count);
+        for (let row = 0; row < count; row++) {
+            if ((!mask || mask[row]) && predicate(row)) next[row] = 1;
         }
-        
-        // Location filter
-        if (locationFilter === 'wfh' && !internship.workFromHome) {
-            return false;
+        mask = next;
+    };
+    
+    // Type and WFH filters
+    if (typeFilter) keepRows(table.typeRows[typeFilter] || []);
+    if (locationFilter === 'wfh') keepRows(table.wfhRows);
+    
+    // Search filter
+    if (searchTerm) {
+        const matchingIds = searchIds(searchTerm);
+        if (matchingIds) {
+            const rows = [];
+            matchingIds.forEach(id => {
+                const row = table.rowById.get(id);
+                if (row !== undefined) rows.push(row);
+            });
+            keepRows(rows);
+        } else {
+            const text = searchableText();
+            keepWhere(row => text[row].includes(searchTerm));
         }
-        
-        return true;
-    });
+    }
+    
+    // Location and skill filters match case-insensitively, like the
+    // facet counts (COLLATE NOCASE rollups)
+    const normalize = value => String(value).trim().toLowerCase();
+    if (locationFilter && locationFilter !== 'wfh') {
+        const location = normalize(locationFilter);
+        keepWhere(row => (columns.location[row] || '').split(',').some(value => normalize(value) === location));
+    }
+    
+    if (skillFilter) {
+        const skill = normalize(skillFilter);
+        keepWhere(row => (columns.skills[row] || []).some(value => normalize(value) === skill));
+    }
     
     // Sort
-    filteredInternships.sort((a, b) => {
-        switch (sortBy) {
-            case 'recent':
-                return new Date(b.scrapedAt) - new Date(a.scrapedAt);
-            
-            case 'stipend-high':
-                const stipendA = (a.stipend?.max || a.stipend?.min || 0);
-                const stipendB = (b.stipend?.max || b.stipend?.min || 0);
-                return stipendB - stipendA;
-            
-            case 'views':
-                return (b.views || 0) - (a.views || 0);
-            
-            case 'registrations':
-                return (b.registrations || 0) - (a.registrations || 0);
-            
-            default:
-                return 0;
-        }
-    });
+    const order = table.sorts[sortBy] || table.sorts.recent;
+    filteredRows = mask ? order.filter(row => mask[row]) : order;
     
     renderInternships();
 }
 
+// Lowercased title, company, location and skills per row, built on first
+// use when there is no search index
+function searchableText() {
+    if (!table.searchText) {
+        const c = table.columns;
+        table.searchText = c.id.map((id, row) => [
+            c.title[row],
+            c.company[row],
+            c.location[row],
+            ...(c.skills[row] || [])
+        ].join(' ').toLowerCase());
+    }
+    return table.searchText;
+}
+
 // ===========================
 // Rendering
 // ===========================
+// Only the card rows around the viewport are in the DOM. The grid keeps
+// the height of every result row (cards have a fixed height) and is
+// padded down to the first rendered row, so the scrollbar stays accurate.
+const OVERSCAN_ROWS = 2;
+let gridLayout = { columns: 1, rowHeight: 1, rowGap: 0 };
+let renderedRange = null;
+let renderedCards = new Map();
+
 function renderInternships() {
-    elements.internshipsGrid.innerHTML = '';
+    const grid = elements.internshipsGrid;
+    grid.classList.remove('scrolled');
+    renderedRange = null;
+    renderedCards = new Map();
     
-    if (filteredInternships.length === 0) {
+    if (filteredRows.length === 0) {
+        grid.replaceChildren();
+        grid.style.height = '';
+        grid.style.paddingTop = '';
         elements.emptyState.style.display = 'block';
         elements.resultsInfo.style.display = 'none';
         return;
@@ -179,12 +446,49 @@ function renderInternships() {
     
     elements.emptyState.style.display = 'none';
     elements.resultsInfo.style.display = 'block';
-    elements.resultsCount.textContent = filteredInternships.length;
+    elements.resultsCount.textContent = filteredRows.length;
     
-    filteredInternships.forEach(internship => {
-        const card = createInternshipCard(internship);
-        elements.internshipsGrid.appendChild(card);
-    });
+    measureGrid();
+    renderWindow();
+}
+
+function measureGrid() {
+    const style = getComputedStyle(elements.internshipsGrid);
+    const rowGap = parseFloat(style.rowGap) || 0;
+    const cardHeight = parseFloat(style.gridAutoRows) || 440;
+    gridLayout = {
+        columns: Math.max(1, style.gridTemplateColumns.split(' ').filter(Boolean).length),
+        rowHeight: cardHeight + rowGap,
+        rowGap
+    };
+}
+
+function renderWindow() {
+    if (filteredRows.length === 0) return;
+    
+    const grid = elements.internshipsGrid;
+    const { columns, rowHeight, rowGap } = gridLayout;
+    const totalRows = Math.ceil(filteredRows.length / columns);
+    const gridTop = grid.getBoundingClientRect().top + window.scrollY;
+    const viewTop = window.scrollY - gridTop;
+    const first = Math.max(0, Math.floor(viewTop / rowHeight) - OVERSCAN_ROWS);
+    const last = Math.min(totalRows, Math.ceil((viewTop + window.innerHeight) / rowHeight) + OVERSCAN_ROWS);
+    
+    if (renderedRange && renderedRange.first === first && renderedRange.last === last) return;
+    renderedRange = { first, last };
+    
+    grid.style.height = `${totalRows * rowHeight - rowGap}px`;
+    grid.style.paddingTop = `${first * rowHeight}px`;
+    
+    // Reuse cards that stay in the window
+    const cards = new Map();
+    const end = Math.min(last * columns, filteredRows.length);
+    for (let i = first * columns; i < end; i++) {
+        const row = filteredRows[i];
+        cards.set(row, renderedCards.get(row) || createInternshipCard(rowItem(row)));
+    }
+    grid.replaceChildren(...cards.values());
+    renderedCards = cards;
 }
 
 function createInternshipCard(internship) {
@@ -300,14 +604,31 @@ function setupEventListeners() {
     // Filters
     elements.typeFilter.addEventListener('change', applyFilters);
     elements.locationFilter.addEventListener('change', applyFilters);
+    elements.skillFilter.addEventListener('change', applyFilters);
     elements.sortBy.addEventListener('change', applyFilters);
     
+    // Virtualized grid
+    let frame = null;
+    const scheduleWindow = (remeasure) => {
+        if (remeasure) renderedRange = null;
+        if (frame !== null) return;
+        frame = requestAnimationFrame(() => {
+            frame = null;
+            if (renderedRange === null) measureGrid();
+            elements.internshipsGrid.classList.add('scrolled');
+            renderWindow();
+        });
+    };
+    window.addEventListener('scroll', () => scheduleWindow(false), { passive: true });
+    window.addEventListener('resize', () => scheduleWindow(true));
+    
     // Reset
     elements.resetFilters.addEventListener('click', () => {
         elements.searchInput.value = '';
         elements.clearBtn.style.display = 'none';
         elements.typeFilter.value = '';
         elements.locationFilter.value = '';
+        elements.skillFilter.value = '';
         elements.sortBy.value = 'recent';
         applyFilters();
     });
@@ -333,5 +654,7 @@ function debounce(func, wait) {
 // ===========================
 document.addEventListener('DOMContentLoaded', () => {
     setupEventListeners();
+    loadStats();
     loadInternships();
+    loadSearchIndex();
 });
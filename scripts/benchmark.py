@@ -0,0 +1,298 @@
+"""
+Performance benchmarks for the scraper, database and exporters.
+
+Generates synthetic items shaped like real Unstop payloads, serves them from
+a local stub API (with configurable latency and error rate) and times each
+stage at several dataset sizes. Results are printed and written as JSON so
+runs from different commits can be compared:
+
+    python scripts/benchmark.py --sizes 1000,10000 --output bench.json
+    python scripts/benchmark.py --sizes 1000 --compare bench.json
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src import api_client, backfill, backup_store, config, digest, scraper  # noqa: E402
+from src.database import InternshipDB  # noqa: E402
+
+SKILLS = ["Python", "Java", "SQL", "React", "Django", "Excel", "Figma", "Marketing", "Sales", "Node.js"]
+CITIES = ["Bangalore", "Mumbai", "Delhi", "Pune", "Hyderabad", "Chennai", "Kolkata"]
+COMPANIES = [f"Company {i}" for i in range(200)]
+
+
+def make_item(index: int, now: datetime.datetime, rng: random.Random) -> Dict[str, Any]:
+    """One synthetic listing, newest first by index, with a few KB of HTML details."""
+    stipend_min = rng.choice([0, 5000, 10000, 15000, 20000])
+    paragraphs = "".join(
+        f"<p>Responsibility {i}: work on <b>{rng.choice(SKILLS)}</b> features &amp; reviews.</p>"
+        for i in range(40)
+    )
+    return {
+        "id": 1000000 + index,
+        "title": f"{rng.choice(SKILLS)} Intern {index}",
+        "organisation_name": rng.choice(COMPANIES),
+        "logo_url": f"https://example.com/logo/{index % 200}.png",
+        "type": "internship",
+        "approved_date": (now - datetime.timedelta(minutes=index)).isoformat(),
+        "stipend": {"min": stipend_min, "max": stipend_min + 5000, "currency": "INR"},
+        "jobDetail": {"min_salary": stipend_min, "max_salary": stipend_min + 5000, "currency": "fa-rupee"},
+        "filters": [{"name": "Undergraduate"}] if index % 2 else [{"name": "Postgraduate"}],
+        "duration": f"{rng.randint(1, 6)} months",
+        "locations": [{"city": city} for city in rng.sample(CITIES, 2)],
+        "is_work_from_home": index % 3 == 0,
+        "skills_required": [{"skill": skill} for skill in rng.sample(SKILLS, 3)],
+        "registration_end_date": (now + datetime.timedelta(days=rng.randint(1, 30))).isoformat(),
+        "seo_url": f"https://unstop.com/internships/intern-{index}",
+        "views_count": rng.randint(0, 10000),
+        "registrations_count": rng.randint(0, 500),
+        "details": f"<div>{paragraphs}</div>",
+    }
+
+
+def make_items(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return [make_item(i, now, rng) for i in range(count)]
+
+
+class StubAPI:
+    """Local stand-in for the Unstop search API, serving items page by page."""
+
+    def __init__(self, items: List[Dict[str, Any]], latency: float = 0.0, error_rate: float = 0.0, seed: int = 7):
+        self.items = items
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+        rng = random.Random(seed)
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if stub.error_rate and rng.random() < stub.error_rate:
+                    self.send_response(503)
+                    self.send_header("Retry-After", "0")
+                    self.end_headers()
+                    return
+                query = parse_qs(urlparse(self.path).query)
+                page = int(query.get("page", ["1"])[0])
+                per_page = int(query.get("per_page", ["20"])[0])
+                chunk = stub.items[(page - 1) * per_page:page * per_page]
+                body = json.dumps({"data": {"data": chunk}}).encode()
+                etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/api/public/opportunity/search-new"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def timed(name: str, rows: int, func: Callable[[], Any], results: List[Dict[str, Any]], **extra) -> Any:
+    start = time.perf_counter()
+    value = func()
+    seconds = time.perf_counter() - start
+    result = {"name": name, "rows": rows, "seconds": round(seconds, 4),
+              "rows_per_second": round(rows / seconds, 1) if seconds else None}
+    result.update(extra)
+    results.append(result)
+    print(f"  {name:<32} {rows:>8} rows  {seconds:8.3f}s  {result['rows_per_second'] or 0:>10.0f} rows/s")
+    return value
+
+
+def configure(workdir: str, args: argparse.Namespace) -> None:
+    """Point the package at a scratch directory and the benchmark settings."""
+    config.ROOT_DIR = workdir
+    config.DATA_DIR = os.path.join(workdir, "data", "internships")
+    config.BACKUP_DIR = os.path.join(config.DATA_DIR, "segments")
+    config.LOG_DIR = os.path.join(workdir, "logs")
+    config.LOG_LEVEL = "WARNING"
+    config.API_PER_PAGE = args.per_page
+    config.REQUEST_DELAY_SECONDS = 0
+    config.RATE_LIMIT_PER_SECOND = 0
+    config.FETCH_CONCURRENCY = args.concurrency
+    config.HOURS_LOOKBACK = 24 * 365 * 10
+    config.HTTP_CACHE_MODE = "off"
+    config.HTTP_CACHE_PATH = os.path.join(workdir, "data", "http_cache.db")
+    api_client._session = None
+    api_client._limiter = None
+    api_client._cache = None
+
+
+def run_size(size: int, args: argparse.Namespace, results: List[Dict[str, Any]]) -> None:
+    print(f"\n== {size} items ==")
+    items = make_items(size)
+    workdir = tempfile.mkdtemp(prefix="internship-bench-")
+    try:
+        configure(workdir, args)
+        pages = (size + args.per_page - 1) // args.per_page
+        config.MAX_PAGES = pages + 1
+
+        with StubAPI(items, latency=args.latency, error_rate=args.error_rate) as stub:
+            fetch_pages = min(pages, args.fetch_pages)
+            timed("fetch_page (sequential)", fetch_pages * args.per_page,
+                  lambda: [api_client.fetch_page(p, base_url=stub.url) for p in range(1, fetch_pages + 1)],
+                  results, size=size, pages=fetch_pages)
+            timed("fetch_pages (concurrent)", size,
+                  lambda: sum(1 for _ in api_client.fetch_pages(base_url=stub.url)),
+                  results, size=size, pages=pages)
+
+            config.API_BASE_URL = stub.url
+            stub.requests = 0
+            timed("scraper.main (end-to-end)", size, lambda: scraper.main([]), results, size=size)
+            results[-1]["requests"] = stub.requests
+
+            config.HTTP_CACHE_MODE = "on"
+            timed("fetch_pages (cache cold)", size,
+                  lambda: sum(1 for _ in api_client.fetch_pages(base_url=stub.url)),
+                  results, size=size, pages=pages)
+            timed("fetch_pages (304 revalidated)", size,
+                  lambda: sum(1 for _ in api_client.fetch_pages(base_url=stub.url)),
+                  results, size=size, pages=pages)
+            stub.requests = 0
+            config.HTTP_CACHE_MODE = "offline"
+            timed("fetch_pages (offline replay)", size,
+                  lambda: sum(1 for _ in api_client.fetch_pages(base_url=stub.url)),
+                  results, size=size, pages=pages)
+            results[-1]["requests"] = stub.requests
+            config.HTTP_CACHE_MODE = "off"
+
+        per_row = min(size, args.per_row_limit)
+        per_row_db = InternshipDB(os.path.join(workdir, "per-row.db"))
+        timed("add_internship (per row)", per_row,
+              lambda: [per_row_db.add_internship(item) for item in items[:per_row]], results, size=size)
+
+        db = InternshipDB(os.path.join(workdir, "bench.db"))
+        timed("add_internships (bulk)", size, lambda: db.add_internships(items), results, size=size)
+        timed("add_internships (re-ingest)", size, lambda: db.add_internships(items), results, size=size)
+
+        docs = os.path.join(workdir, "docs", "data")
+        timed("export_to_json", size, lambda: db.export_to_json(os.path.join(docs, "internships.json")),
+              results, size=size)
+        timed("export_columnar", size, lambda: db.export_columnar(os.path.join(docs, "listings.json")),
+              results, size=size)
+        timed("export_shards", size, lambda: db.export_shards(docs), results, size=size)
+        timed("export_shards (unchanged)", size, lambda: db.export_shards(docs), results, size=size)
+
+        payloads = [(str(item["id"]), json.dumps(item, ensure_ascii=False)) for item in items]
+        with backup_store.SegmentStore(os.path.join(workdir, "segments"), day="2026-01-01") as store:
+            timed("backup segment (new)", size, lambda: store.append(payloads), results, size=size)
+            timed("backup segment (unchanged)", size, lambda: store.append(payloads), results, size=size)
+            timed("backup snapshot", size, lambda: sum(1 for _ in store.snapshot("2026-01-01")), results, size=size)
+
+        backup_path = os.path.join(workdir, "backup.ndjson")
+        with open(backup_path, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(item, ensure_ascii=False) + "\n" for item in items)
+        for workers in sorted({1, os.cpu_count() or 1}):
+            backfill_db = InternshipDB(os.path.join(workdir, f"backfill-{workers}.db"))
+            timed(f"backfill ({workers} workers)", size,
+                  lambda: backfill.backfill([backup_path], backfill_db, workers=workers), results, size=size)
+
+        timed("digest", size, lambda: run_digest(db, workdir), results, size=size)
+        timed("digest (cached)", size, lambda: run_digest(db, workdir), results, size=size)
+    finally:
+        logging.getLogger().handlers.clear()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def run_digest(db: InternshipDB, workdir: str) -> None:
+    """Full digest of every listing, without moving the watermark."""
+    messages, _, _ = digest.build_digest(db, since_id=0)
+    digest.write_digest(messages, os.path.join(workdir, "digest_output.txt"))
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str) -> None:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["name"], r.get("size")): r for r in json.load(f)["results"]}
+    print(f"\nCompared with {baseline_path} (ratio > 1 means slower):")
+    for result in results:
+        before = baseline.get((result["name"], result.get("size")))
+        if before and before["seconds"]:
+            ratio = result["seconds"] / before["seconds"]
+            flag = "  <-- regression" if ratio > 1.2 else ""
+            print(f"  {result['name']:<32} {result.get('size'):>8}  {ratio:6.2f}x{flag}")
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark scrape, ingest and export stages.")
+    parser.add_argument("--sizes", default="1000,10000", help="comma-separated item counts (e.g. 1000,10000,100000)")
+    parser.add_argument("--per-page", type=int, default=20, help="items per stub API page")
+    parser.add_argument("--concurrency", type=int, default=4, help="FETCH_CONCURRENCY for the run")
+    parser.add_argument("--latency", type=float, default=0.0, help="stub API latency per request (seconds)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of stub requests answered with 503")
+    parser.add_argument("--fetch-pages", type=int, default=50, help="pages timed for sequential fetch_page")
+    parser.add_argument("--per-row-limit", type=int, default=1000, help="max items for the per-row insert timing")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against a previous --output file")
+    args = parser.parse_args(argv)
+
+    results: List[Dict[str, Any]] = []
+    for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+        run_size(size, args, results)
+
+    report = {
+        "revision": git_revision(),
+        "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
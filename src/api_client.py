@@ -1,15 +1,156 @@
 import logging
-from typing import List
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 import requests
-from . import config
+from requests.adapters import HTTPAdapter
+from . import config, metrics
+from .http_cache import ResponseCache
 
 
-def fetch_page(page: int) -> List[dict]:
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket shared by all fetch workers.
+    The rate is halved on 429/5xx responses (and requests are held back for
+    any Retry-After period), then recovers gradually on success.
+    A rate of 0 disables limiting.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a request may be sent."""
+        if self.max_rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def backoff(self, delay: Optional[float] = None) -> None:
+        """Slow down after a throttled or failed request."""
+        with self._lock:
+            self.rate = max(self.max_rate / 16, self.rate / 2)
+            if delay:
+                self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+
+    def recover(self) -> None:
+        """Step the rate back towards the configured maximum."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate * 1.25)
+
+
+_session: Optional[requests.Session] = None
+_limiter: Optional[RateLimiter] = None
+_cache: Optional[ResponseCache] = None
+_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Return the shared, connection-pooled session."""
+    global _session
+    with _lock:
+        if _session is None:
+            # Enough connections for every target the scheduler runs at once
+            pool_size = max(config.FETCH_CONCURRENCY, 1) * max(config.CRAWL_PARALLEL_TARGETS, 1)
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(HEADERS)
+            _session = session
+        return _session
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide rate limiter."""
+    global _limiter
+    with _lock:
+        if _limiter is None:
+            _limiter = RateLimiter(config.RATE_LIMIT_PER_SECOND, burst=config.FETCH_CONCURRENCY)
+        return _limiter
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the process-wide response cache, or None when HTTP_CACHE_MODE is off."""
+    global _cache
+    if config.HTTP_CACHE_MODE == "off":
+        return None
+    with _lock:
+        if _cache is None:
+            _cache = ResponseCache(
+                config.HTTP_CACHE_PATH,
+                ttl_seconds=config.HTTP_CACHE_TTL_HOURS * 3600,
+                max_bytes=int(config.HTTP_CACHE_MAX_MB * 1024 * 1024),
+                offline=config.HTTP_CACHE_MODE == "offline",
+            )
+        return _cache
+
+
+def _retry_after(resp: requests.Response) -> Optional[float]:
+    """Parse a Retry-After header (seconds or HTTP date)."""
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _extract_items(data) -> List[dict]:
+    if isinstance(data, dict):
+        # Handle nested data.data structure from Unstop API
+        raw_data = data.get("data")
+        if isinstance(raw_data, dict) and "data" in raw_data:
+            return raw_data["data"]
+        return raw_data or data.get("items") or data.get("results") or []
+    if isinstance(data, list):
+        return data
+    return []
+
+
+def fetch_page(page: int, base_url: Optional[str] = None, params: Optional[Dict[str, Any]] = None) -> List[dict]:
     """
     Fetch a single page of internships from the API.
-    Requires API_BASE_URL set in the .env file. Returns [] on error.
+    Requires API_BASE_URL set in the .env file (or an explicit base_url).
+    `params` are added to (and override) the default query parameters.
+    Retries 429/5xx responses with backoff. Returns [] on error.
+    With the response cache enabled, requests are conditional and a 304
+    is answered from the cache; in offline mode only the cache is used.
     """
-    if not config.API_BASE_URL:
+    url = base_url or config.API_BASE_URL
+    if not url:
         logging.warning("API_BASE_URL not set; returning no results.")
         return []
 
@@ -17,26 +158,102 @@ def fetch_page(page: int) -> List[dict]:
         "page": page,
         "per_page": config.API_PER_PAGE,
         "hours_lookback": config.HOURS_LOOKBACK,
+        **(params or {}),
     }
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
+    cache = get_response_cache()
+    key = cache.key(url, params) if cache else None
+    if config.HTTP_CACHE_MODE == "offline":
+        items = cache.load(key, _extract_items)
+        metrics.incr("http.cache_hits" if items is not None else "http.cache_misses")
+        return items or []
+
+    session = get_session()
+    limiter = get_rate_limiter()
+
+    for attempt in range(config.MAX_RETRIES + 1):
+        with metrics.timer("http.rate_limit_wait"):
+            limiter.acquire()
+        try:
+            headers = cache.validators(key) if cache else None
+            with metrics.timer("http.request"):
+                resp = session.get(url, params=params, headers=headers, timeout=30)
+            metrics.incr("http.requests")
+            metrics.incr("http.bytes", len(resp.content))
+            if resp.status_code in RETRY_STATUS_CODES and attempt < config.MAX_RETRIES:
+                delay = _retry_after(resp)
+                if delay is None:
+                    delay = config.REQUEST_DELAY_SECONDS * (2 ** attempt)
+                logging.warning(f"Page {page}: HTTP {resp.status_code}, retrying in {delay:.1f}s")
+                metrics.incr("http.retries")
+                limiter.backoff(delay)
+                continue
+            if resp.status_code == 304 and cache:
+                items = cache.load(key, _extract_items)
+                if items is not None:
+                    limiter.recover()
+                    metrics.incr("http.not_modified")
+                    return items
+            resp.raise_for_status()
+            limiter.recover()
+            with metrics.timer("http.decode"):
+                if cache:
+                    return cache.store(
+                        key, resp.content, resp.headers.get("ETag"), resp.headers.get("Last-Modified"),
+                        _extract_items,
+                    )
+                return _extract_items(resp.json())
+        except requests.ConnectionError as e:
+            if attempt < config.MAX_RETRIES:
+                logging.warning(f"Page {page}: connection error, retrying: {e}")
+                metrics.incr("http.retries")
+                limiter.backoff(config.REQUEST_DELAY_SECONDS * (2 ** attempt))
+                continue
+            logging.error(f"API request failed: {e}")
+            metrics.incr("http.errors")
+            return []
+        except Exception as e:
+            logging.error(f"API request failed: {e}")
+            metrics.incr("http.errors")
+            return []
+    return []
+
+
+def fetch_pages(
+    start_page: int = 1,
+    max_pages: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    base_url: Optional[str] = None,
+    params: Optional[Dict[str, Any]] = None,
+) -> Iterator[Tuple[int, List[dict]]]:
+    """
+    Yield (page, items) in page order, keeping up to `concurrency` requests
+    in flight. Stops at the first empty page or after max_pages pages.
+    Break out of the loop (or close the generator) to stop early; pages
+    already queued are cancelled.
+    """
+    if max_pages is None:
+        max_pages = config.MAX_PAGES
+    if concurrency is None:
+        concurrency = config.FETCH_CONCURRENCY
+    concurrency = max(1, concurrency)
+    last_page = start_page + max_pages - 1
+
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="fetch")
+    pending = deque()
+    next_page = start_page
     try:
-        resp = requests.get(config.API_BASE_URL, params=params, headers=headers, timeout=30)
-        resp.raise_for_status()
-        data = resp.json()
-        if isinstance(data, dict):
-            # Handle nested data.data structure from Unstop API
-            raw_data = data.get("data")
-            if isinstance(raw_data, dict) and "data" in raw_data:
-                items = raw_data["data"]
-            else:
-                items = raw_data or data.get("items") or data.get("results") or []
-        elif isinstance(data, list):
-            items = data
-        else:
-            items = []
-        return items
-    except Exception as e:
-        logging.error(f"API request failed: {e}")
-        return []
+        while True:
+            while len(pending) < concurrency and next_page <= last_page:
+                pending.append((next_page, executor.submit(fetch_page, next_page, base_url, params)))
+                next_page += 1
+            if not pending:
+                return
+            page, future = pending.popleft()
+            items = future.result()
+            if not items:
+                return
+            yield page, items
+    finally:
+        for _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
@@ -0,0 +1,149 @@
+"""
+Re-import backup files into the database.
+
+    python -m src.backfill                          # every backup in data/internships
+    python -m src.backfill data/internships/internships_2026-01-24.json --workers 8
+
+All backup formats are read: dated .json exports ({"items": [...]}), the
+daily .ndjson files and the gzip segments of the backup store. Parsing,
+normalization and serialization of the raw payloads run in a process pool,
+chunk by chunk; this process is the single writer and stores each
+normalized chunk in one transaction.
+"""
+import argparse
+import glob
+import gzip
+import json
+import logging
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from . import config, metrics, utils
+from .database import InternshipDB, normalize_item
+
+
+def backup_files(directory: Optional[str] = None, segment_dir: Optional[str] = None) -> List[str]:
+    """
+    Legacy backups in `directory` (default DATA_DIR) followed by the backup
+    store segments in `segment_dir` (default BACKUP_DIR), oldest first.
+    """
+    directory = directory or config.DATA_DIR
+    paths = glob.glob(os.path.join(directory, "*.json")) + glob.glob(os.path.join(directory, "*.ndjson"))
+    segments = glob.glob(os.path.join(segment_dir or config.BACKUP_DIR, "*.ndjson.gz"))
+    return sorted(p for p in paths if not p.endswith(".meta.json")) + sorted(segments)
+
+
+def read_chunks(path: str, chunk_size: int) -> Iterator[List[Any]]:
+    """
+    Yield chunks of a backup file: raw lines for .ndjson and .ndjson.gz
+    (parsed by the workers), decoded items for .json exports.
+    """
+    if path.endswith((".ndjson", ".ndjson.gz")):
+        with (gzip.open if path.endswith(".gz") else open)(path, "rt", encoding="utf-8") as f:
+            yield from utils.chunked((line for line in f if line.strip()), chunk_size)
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    items = data.get("items", []) if isinstance(data, dict) else data
+    yield from utils.chunked(items, chunk_size)
+
+
+def normalize_chunk(chunk: List[Any]) -> Tuple[List[tuple], int]:
+    """Worker: parse (if needed) and normalize a chunk. Returns (rows, invalid count)."""
+    rows = []
+    invalid = 0
+    for entry in chunk:
+        try:
+            item = json.loads(entry) if isinstance(entry, str) else entry
+        except ValueError:
+            invalid += 1
+            continue
+        row = normalize_item(item) if isinstance(item, dict) else None
+        if row is None:
+            invalid += 1
+        else:
+            rows.append(row)
+    return rows, invalid
+
+
+def backfill(
+    paths: List[str],
+    db: InternshipDB,
+    workers: Optional[int] = None,
+    chunk_size: int = 1000,
+    upsert: Optional[bool] = None,
+) -> Dict[str, int]:
+    """
+    Import backup files in order. Up to two chunks per worker are in
+    flight; results are written in submission order so later files win.
+    Returns item counts.
+    """
+    totals = {"files": 0, "items": 0, "new": 0, "updated": 0, "duplicate": 0, "invalid": 0}
+
+    def chunks() -> Iterator[List[Any]]:
+        for path in paths:
+            logging.info(f"Backfilling {path}")
+            totals["files"] += 1
+            yield from read_chunks(path, chunk_size)
+
+    def write(rows: List[tuple], invalid: int) -> None:
+        counts = db.add_rows(rows, upsert=upsert)
+        totals["items"] += len(rows) + invalid
+        totals["invalid"] += invalid
+        for key in ("new", "updated", "duplicate"):
+            totals[key] += counts[key]
+
+    workers = workers or os.cpu_count() or 1
+    with metrics.timer("backfill"):
+        if workers == 1:
+            for chunk in chunks():
+                write(*normalize_chunk(chunk))
+            return totals
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for chunk in chunks():
+                pending.append(executor.submit(normalize_chunk, chunk))
+                if len(pending) >= 2 * workers:
+                    write(*pending.popleft().result())
+            while pending:
+                write(*pending.popleft().result())
+    return totals
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Re-import JSON / NDJSON backups into the database.")
+    parser.add_argument("paths", nargs="*", help="backup files (default: every backup in data/internships)")
+    parser.add_argument("--db", help="database path (defaults to data/internships.db)")
+    parser.add_argument("--workers", type=int, help="normalization processes (default: CPU count, 1 = inline)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="items per worker task and transaction")
+    parser.add_argument(
+        "--mode", choices=("upsert", "insert"),
+        help="refresh changed listings or keep existing ones (default: INGEST_MODE)",
+    )
+    args = parser.parse_args(argv)
+
+    utils.setup_logging()
+    paths = args.paths or backup_files()
+    if not paths:
+        print("No backup files found.")
+        return 1
+
+    upsert = None if args.mode is None else args.mode == "upsert"
+    with InternshipDB(args.db) as db:
+        totals = backfill(paths, db, workers=args.workers, chunk_size=args.chunk_size, upsert=upsert)
+        db.optimize()
+    seconds = metrics.registry.snapshot()["timers"]["backfill"]["total"]
+    print(
+        f"Backfilled {totals['items']} items from {totals['files']} files in {seconds:.1f}s: "
+        f"{totals['new']} new, {totals['updated']} updated, {totals['duplicate']} unchanged, "
+        f"{totals['invalid']} invalid"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+"""
+Append-only, deduplicated backup store of raw API items.
+
+Items are appended to one gzip-compressed NDJSON segment per day
+(segments/YYYY-MM-DD.ndjson.gz), one gzip member per written chunk, and
+only when their payload differs from every version of that listing already
+stored. A small SQLite index (segments/index.db) records where each payload
+lives (segment, member offset, line) and which listings were fetched on
+which day, so the items of any day can be rebuilt by decompressing only the
+members they point to.
+
+    python -m src.backup_store snapshot 2026-01-24 --output snapshot.ndjson
+    python -m src.backup_store import data/internships/*.ndjson   # legacy daily backups
+"""
+import argparse
+import datetime
+import gzip
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import sys
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from . import config, metrics, utils
+from .backfill import normalize_chunk, read_chunks
+
+# Legacy backups are named internships_YYYY-MM-DD.json / .ndjson
+_DAY_RE = re.compile(r"(\d{4}-\d{2}-\d{2})")
+
+
+def _payload_hash(raw: str) -> str:
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _read_member(path: str, offset: int) -> List[str]:
+    """Lines of the gzip member starting at `offset` in a segment."""
+    decompressor = zlib.decompressobj(wbits=31)
+    data = []
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while not decompressor.eof:
+            block = f.read(65536)
+            if not block:
+                break
+            data.append(decompressor.decompress(block))
+    return b"".join(data).decode("utf-8").splitlines()
+
+
+class SegmentStore:
+    """Backup segments plus their index; a pipeline backup target."""
+
+    def __init__(self, directory: Optional[str] = None, day: Optional[str] = None):
+        self.directory = directory or config.BACKUP_DIR
+        self.day = day or datetime.date.today().isoformat()
+        os.makedirs(self.directory, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(self.directory, "index.db"))
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS payloads (
+                    unstop_id TEXT NOT NULL,
+                    payload_hash TEXT NOT NULL,
+                    segment TEXT NOT NULL,
+                    offset INTEGER NOT NULL,
+                    line INTEGER NOT NULL,
+                    PRIMARY KEY (unstop_id, payload_hash)
+                ) WITHOUT ROWID
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS sightings (
+                    day TEXT NOT NULL,
+                    unstop_id TEXT NOT NULL,
+                    payload_hash TEXT NOT NULL,
+                    PRIMARY KEY (day, unstop_id)
+                ) WITHOUT ROWID
+            """)
+
+    @property
+    def segment(self) -> str:
+        """File name of the segment appended to by this store."""
+        return f"{self.day}.ndjson.gz"
+
+    def append(self, entries: Iterable[Tuple[str, str]]) -> int:
+        """
+        Record (unstop_id, raw JSON) entries as fetched today. Payloads not
+        stored before are appended to today's segment as one gzip member.
+        Returns the number of payloads written.
+        """
+        entries = [(unstop_id, raw, _payload_hash(raw)) for unstop_id, raw in entries]
+        if not entries:
+            return 0
+
+        with metrics.timer("backup.write"):
+            known = set()
+            for ids in utils.chunked({unstop_id for unstop_id, _, _ in entries}, 500):
+                known.update(self._conn.execute(
+                    f"SELECT unstop_id, payload_hash FROM payloads WHERE unstop_id IN ({', '.join('?' for _ in ids)})",
+                    ids,
+                ).fetchall())
+
+            lines = []
+            for unstop_id, raw, payload_hash in entries:
+                if (unstop_id, payload_hash) not in known:
+                    known.add((unstop_id, payload_hash))
+                    lines.append((unstop_id, payload_hash, raw))
+
+            with self._conn:
+                if lines:
+                    # Bytes appended before a crash but never indexed are simply ignored
+                    with open(os.path.join(self.directory, self.segment), "ab") as f:
+                        offset = f.tell()
+                        f.write(gzip.compress("".join(raw + "\n" for _, _, raw in lines).encode("utf-8"), mtime=0))
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO payloads (unstop_id, payload_hash, segment, offset, line) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        [(unstop_id, payload_hash, self.segment, offset, line)
+                         for line, (unstop_id, payload_hash, _) in enumerate(lines)],
+                    )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO sightings (day, unstop_id, payload_hash) VALUES (?, ?, ?)",
+                    [(self.day, unstop_id, payload_hash) for unstop_id, _, payload_hash in entries],
+                )
+
+        metrics.incr("backup.lines", len(lines))
+        metrics.incr("backup.deduplicated", len(entries) - len(lines))
+        return len(lines)
+
+    def write(self, records: Iterable) -> None:
+        """Pipeline hook: back up the raw payloads of normalized records."""
+        self.append((record.row[0], record.row[-1]) for record in records)
+
+    def days(self) -> List[str]:
+        return [row[0] for row in self._conn.execute("SELECT DISTINCT day FROM sightings ORDER BY day")]
+
+    def snapshot(self, day: str) -> Iterator[str]:
+        """Raw JSON lines of every listing fetched on `day`, by segment position."""
+        locations: Dict[Tuple[str, int], List[int]] = defaultdict(list)
+        for segment, offset, line in self._conn.execute("""
+            SELECT p.segment, p.offset, p.line
+            FROM sightings s JOIN payloads p USING (unstop_id, payload_hash)
+            WHERE s.day = ?
+            ORDER BY p.segment, p.offset, p.line
+        """, (day,)):
+            locations[(segment, offset)].append(line)
+
+        for (segment, offset), numbers in locations.items():
+            lines = _read_member(os.path.join(self.directory, segment), offset)
+            for number in numbers:
+                yield lines[number]
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def import_backup(path: str, directory: Optional[str] = None) -> int:
+    """Add a legacy daily .json / .ndjson backup into the store. Returns payloads written."""
+    match = _DAY_RE.search(os.path.basename(path))
+    day = match.group(1) if match else None
+    written = 0
+    with SegmentStore(directory, day=day) as store:
+        for chunk in read_chunks(path, 1000):
+            rows, _ = normalize_chunk(chunk)
+            written += store.append((row[0], row[-1]) for row in rows)
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Read and maintain the segmented backup store.")
+    parser.add_argument("--dir", help="store directory (defaults to BACKUP_DIR)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    snapshot = commands.add_parser("snapshot", help="write the listings fetched on a day as NDJSON")
+    snapshot.add_argument("day", help="YYYY-MM-DD")
+    snapshot.add_argument("--output", help="output file (default: stdout)")
+    importer = commands.add_parser("import", help="add legacy daily .json / .ndjson backups to the store")
+    importer.add_argument("paths", nargs="+")
+    args = parser.parse_args(argv)
+
+    utils.setup_logging()
+    if args.command == "import":
+        for path in sorted(args.paths):
+            logging.info(f"Imported {import_backup(path, args.dir)} new payloads from {path}")
+        return 0
+
+    with SegmentStore(args.dir) as store:
+        out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+        try:
+            count = 0
+            for line in store.snapshot(args.day):
+                out.write(line + "\n")
+                count += 1
+        finally:
+            if args.output:
+                out.close()
+    logging.info(f"Rebuilt {count} listings fetched on {args.day}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
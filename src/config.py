@@ -12,3 +12,25 @@ API_PER_PAGE = int(os.getenv("API_PER_PAGE", "20"))
 REQUEST_DELAY_SECONDS = float(os.getenv("REQUEST_DELAY_SECONDS", "2"))
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 API_BASE_URL = os.getenv("API_BASE_URL", "")
+FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", "4"))
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "2"))
+MAX_RETRIES = int(os.getenv("MAX_RETRIES", "3"))
+MAX_PAGES = int(os.getenv("MAX_PAGES", "50"))
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "200"))
+WEB_EXPORT_MODE = os.getenv("WEB_EXPORT_MODE", "columnar")
+RAW_DATA_STORAGE = os.getenv("RAW_DATA_STORAGE", "compressed")
+INGEST_MODE = os.getenv("INGEST_MODE", "upsert")
+METRICS_PROMETHEUS_FILE = os.getenv("METRICS_PROMETHEUS_FILE", "")
+DIGEST_MAX_CHARS = int(os.getenv("DIGEST_MAX_CHARS", "4096"))
+HTTP_CACHE_MODE = os.getenv("HTTP_CACHE_MODE", "on")
+HTTP_CACHE_PATH = os.getenv("HTTP_CACHE_PATH") or os.path.join(ROOT_DIR, "data", "http_cache.db")
+HTTP_CACHE_TTL_HOURS = float(os.getenv("HTTP_CACHE_TTL_HOURS", "168"))
+HTTP_CACHE_MAX_MB = float(os.getenv("HTTP_CACHE_MAX_MB", "100"))
+CRAWL_TARGETS_FILE = os.getenv("CRAWL_TARGETS_FILE", "")
+CRAWL_PARALLEL_TARGETS = int(os.getenv("CRAWL_PARALLEL_TARGETS", "4"))
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_CACHE_SIZE = os.getenv("SQLITE_CACHE_SIZE", "-65536")
+SQLITE_MMAP_SIZE = os.getenv("SQLITE_MMAP_SIZE", "268435456")
+SQLITE_TEMP_STORE = os.getenv("SQLITE_TEMP_STORE", "MEMORY")
+ANALYTICS_EXPORT_DIR = os.getenv("ANALYTICS_EXPORT_DIR", "")
+BACKUP_DIR = os.getenv("BACKUP_DIR") or os.path.join(DATA_DIR, "segments")
@@ -1,26 +1,391 @@
 import sqlite3
+import gzip
+import hashlib
+import itertools
 import json
 import os
 import logging
-from typing import List, Dict, Any, Optional
+import re
+import shutil
+import threading
+import uuid
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Tuple
 from datetime import datetime
-from . import config
+from . import config, metrics
+from .dates import to_epoch
+from .utils import chunked, clean_html
+
+try:
+    import brotli
+except ImportError:  # optional: .br siblings are skipped without it
+    brotli = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional: only needed for the Parquet analytics export
+    pyarrow = None
+
+
+INSERT_COLUMNS = (
+    "unstop_id", "title", "company_name", "logo_url", "type",
+    "stipend_min", "stipend_max", "currency", "duration",
+    "location", "work_from_home", "skills",
+    "start_date", "end_date", "deadline", "url",
+    "views", "registrations", "start_at", "end_at", "deadline_at",
+    "content_hash", "raw_data",
+)
+
+# Columns added after the first release, created on open for older databases
+ADDED_COLUMNS = (
+    ("content_hash", "TEXT"),
+    ("start_at", "INTEGER"),
+    ("end_at", "INTEGER"),
+    ("deadline_at", "INTEGER"),
+    ("company_id", "INTEGER"),
+)
+
+HASH_INDEX = INSERT_COLUMNS.index("content_hash")
+COMPANY_INDEX = INSERT_COLUMNS.index("company_name")
+STIPEND_MIN_INDEX = INSERT_COLUMNS.index("stipend_min")
+STIPEND_MAX_INDEX = INSERT_COLUMNS.index("stipend_max")
+WFH_INDEX = INSERT_COLUMNS.index("work_from_home")
+SKILLS_INDEX = INSERT_COLUMNS.index("skills")
+LOCATION_INDEX = INSERT_COLUMNS.index("location")
+ROLLUP_INDEXES = (COMPANY_INDEX, STIPEND_MIN_INDEX, STIPEND_MAX_INDEX, WFH_INDEX, SKILLS_INDEX, LOCATION_INDEX)
+STIPEND_BUCKET_SIZE = 5000
+VIEWS_INDEX = INSERT_COLUMNS.index("views")
+REGISTRATIONS_INDEX = INSERT_COLUMNS.index("registrations")
+
+# Multi-valued facets: (dimension table, junction table, key column, row index)
+FACETS = (
+    ("skills", "internship_skills", "skill_id", SKILLS_INDEX),
+    ("locations", "internship_locations", "location_id", LOCATION_INDEX),
+)
+
+ALL_COLUMNS = ("id",) + INSERT_COLUMNS + ("scraped_at", "first_seen")
+
+# Everything except the raw API payload
+DEFAULT_COLUMNS = tuple(c for c in ALL_COLUMNS if c != "raw_data")
+
+# Columns needed to build a web export item
+WEB_COLUMNS = (
+    "unstop_id", "title", "company_name", "logo_url", "type",
+    "stipend_min", "stipend_max", "currency", "duration",
+    "location", "work_from_home", "skills", "deadline", "url",
+    "views", "registrations", "scraped_at", "first_seen",
+)
+
+# Per-row fields of the columnar web export; type and workFromHome are
+# encoded by the facet row lists instead
+COLUMNAR_FIELDS = (
+    "id", "title", "company", "logo", "stipendMin", "stipendMax", "currency",
+    "duration", "location", "skills", "deadline", "url",
+    "views", "registrations", "scrapedAt", "firstSeen",
+)
+
+# Columns of the Parquet analytics export; timestamps become epoch seconds
+ANALYTICS_COLUMNS = (
+    "id", "unstop_id", "title", "company_name", "type",
+    "stipend_min", "stipend_max", "currency", "duration",
+    "location", "work_from_home", "skills", "url",
+    "views", "registrations", "start_at", "end_at", "deadline_at",
+    "scraped_at", "first_seen", "content_hash",
+)
+ANALYTICS_LIST_COLUMNS = ("location", "skills")
+ANALYTICS_INT_COLUMNS = ("stipend_min", "stipend_max", "views", "registrations")
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+INSERT_SQL = (
+    f"INSERT INTO internships ({', '.join(INSERT_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in INSERT_COLUMNS)})"
+)
+
+
+def _write_precompressed(path: str, payload: bytes) -> None:
+    """Write payload plus .gz (and .br when brotli is installed) siblings."""
+    with open(path, "wb") as f:
+        f.write(payload)
+    with open(path + ".gz", "wb") as f:
+        f.write(gzip.compress(payload, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(path + ".br", "wb") as f:
+            f.write(brotli.compress(payload))
+
+
+def _tokenize(text: str) -> List[str]:
+    """Lowercase letter/digit runs; mirrors the tokenizer in docs/app.js."""
+    return _TOKEN_RE.findall(text.lower()) if text else []
+
+
+def _details_text(raw: Optional[str]) -> str:
+    """Plain-text details from a raw JSON payload, for indexing."""
+    if not raw:
+        return ""
+    try:
+        details = json.loads(raw).get("details")
+    except (ValueError, AttributeError):
+        return ""
+    return clean_html(details) if isinstance(details, str) else ""
+
+
+def _fetch_rows(cursor: sqlite3.Cursor, batch_size: int) -> Iterator[Dict[str, Any]]:
+    """Yield row dicts from a cursor in fetchmany batches, decompressing raw_data."""
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        for row in rows:
+            item = dict(row)
+            if isinstance(item.get("raw_data"), bytes):
+                item["raw_data"] = zlib.decompress(item["raw_data"]).decode("utf-8")
+            yield item
+
+
+def _split_list(value: Optional[str]) -> List[str]:
+    """Distinct names from a comma-joined skills/location string, in order."""
+    names = []
+    seen = set()
+    for name in (value or "").split(", "):
+        name = name.strip()
+        if name and name.lower() not in seen:
+            seen.add(name.lower())
+            names.append(name)
+    return names
+
+
+def _as_int(value: Any) -> Optional[int]:
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _analytics_schema() -> "pyarrow.Schema":
+    timestamp = pyarrow.timestamp("s", tz="UTC")
+    types = {
+        "id": pyarrow.int64(),
+        "work_from_home": pyarrow.bool_(),
+        "location": pyarrow.list_(pyarrow.string()),
+        "skills": pyarrow.list_(pyarrow.string()),
+        **{column: pyarrow.int64() for column in ANALYTICS_INT_COLUMNS},
+        **{column: timestamp for column in ("start_at", "end_at", "deadline_at", "scraped_at", "first_seen")},
+    }
+    return pyarrow.schema([(column, types.get(column, pyarrow.string())) for column in ANALYTICS_COLUMNS])
+
+
+def _analytics_table(rows: List[sqlite3.Row], schema: "pyarrow.Schema") -> "pyarrow.Table":
+    """Arrow table for a batch of analytics rows (month first, then ANALYTICS_COLUMNS)."""
+    columns = {column: [row[column] for row in rows] for column in ANALYTICS_COLUMNS}
+    for column in ANALYTICS_LIST_COLUMNS:
+        columns[column] = [_split_list(value) for value in columns[column]]
+    for column in ANALYTICS_INT_COLUMNS:
+        columns[column] = [_as_int(value) for value in columns[column]]
+    columns["work_from_home"] = [None if value is None else bool(value) for value in columns["work_from_home"]]
+    return pyarrow.Table.from_pydict(columns, schema=schema)
+
+
+def _stipend_bucket(stipend_min: Any, stipend_max: Any) -> str:
+    """Histogram bucket label such as '10000-14999' ('0' for unpaid/unknown)."""
+    try:
+        amount = int(stipend_max or stipend_min or 0)
+    except (TypeError, ValueError):
+        amount = 0
+    if amount <= 0:
+        return "0"
+    low = amount // STIPEND_BUCKET_SIZE * STIPEND_BUCKET_SIZE
+    return f"{low}-{low + STIPEND_BUCKET_SIZE - 1}"
+
+
+def _rollup_deltas(rows: Iterable[tuple], sign: int, day: bool = False) -> Counter:
+    """
+    Rollup changes for normalized rows: listings per company, stipend
+    bucket, skill and location, WFH and total counts, and (for new rows)
+    today's count.
+    """
+    deltas = Counter()
+    count = 0
+    for row in rows:
+        count += 1
+        deltas[("total", "")] += sign
+        deltas[("company", row[COMPANY_INDEX] or "Unknown")] += sign
+        deltas[("stipend", _stipend_bucket(row[STIPEND_MIN_INDEX], row[STIPEND_MAX_INDEX]))] += sign
+        if row[WFH_INDEX]:
+            deltas[("wfh", "")] += sign
+        for skill in _split_list(row[SKILLS_INDEX]):
+            deltas[("skill", skill)] += sign
+        for location in _split_list(row[LOCATION_INDEX]):
+            deltas[("location", location)] += sign
+    if day and count:
+        deltas[("day", datetime.utcnow().strftime("%Y-%m-%d"))] += sign * count
+    return deltas
+
+
+def normalize_item(item: Dict[str, Any]) -> Optional[tuple]:
+    """
+    Flatten an API item into a row tuple matching INSERT_COLUMNS.
+    Returns None if the item has no usable ID. Pure (no database access),
+    so it can run in worker processes.
+    """
+    unstop_id = str(item.get("id") or item.get("entity_id") or "")
+
+    if not unstop_id:
+        return None
+
+    # Extract and normalize data
+    title = item.get("title") or item.get("opportunity_title") or "Unknown"
+    company_name = item.get("organisation_name") or item.get("company_name") or "Unknown"
+    logo_url = item.get("logo_url") or item.get("organisation_logo") or ""
+    opportunity_type = item.get("type") or item.get("opportunity_type") or "internship"
+
+    # Stipend
+    stipend_min = item.get("stipend", {}).get("min") if isinstance(item.get("stipend"), dict) else None
+    stipend_max = item.get("stipend", {}).get("max") if isinstance(item.get("stipend"), dict) else None
+    currency = item.get("stipend", {}).get("currency") if isinstance(item.get("stipend"), dict) else "INR"
+
+    # Duration
+    duration = item.get("duration") or item.get("internship_duration") or ""
+
+    # Location
+    location_data = item.get("locations") or []
+    if isinstance(location_data, list) and location_data:
+        location = ", ".join([loc.get("location") or loc.get("city") or str(loc) for loc in location_data[:3]])
+    else:
+        location = str(location_data) if location_data else ""
+
+    work_from_home = 1 if item.get("is_work_from_home") or item.get("work_from_home") else 0
+
+    # Skills
+    skills_data = item.get("skills_required") or item.get("skills") or []
+    if isinstance(skills_data, list):
+        skills = ", ".join([s.get("skill") or s.get("name") or str(s) for s in skills_data if s])
+    else:
+        skills = str(skills_data) if skills_data else ""
+
+    # Dates
+    start_date = item.get("start_date") or item.get("registration_start_date") or ""
+    end_date = item.get("end_date") or item.get("registration_end_date") or ""
+    deadline = item.get("deadline") or item.get("registration_end_date") or ""
+
+    # URL
+    url = item.get("public_url") or item.get("url") or f"https://unstop.com/internships/{unstop_id}"
+
+    # Stats
+    views = item.get("views_count") or item.get("views") or 0
+    registrations = item.get("registrations_count") or item.get("registrations") or 0
+
+    fields = (
+        unstop_id, title, company_name, logo_url, opportunity_type,
+        stipend_min, stipend_max, currency, duration,
+        location, work_from_home, skills,
+        start_date, end_date, deadline, url,
+        views, registrations
+    )
+
+    # Store raw JSON
+    raw_data = json.dumps(item, ensure_ascii=False)
+
+    # Cheap fingerprint of the normalized fields and the raw payload, used by
+    # upserts; details/seo_url changes only show up in the payload
+    content_hash = hashlib.blake2b((repr(fields) + raw_data).encode("utf-8"), digest_size=8).hexdigest()
+
+    # Sortable epoch seconds derived from the date strings
+    epochs = (to_epoch(start_date), to_epoch(end_date), to_epoch(deadline))
+
+    return fields + epochs + (content_hash, raw_data)
 
 
 class InternshipDB:
-    def __init__(self, db_path: Optional[str] = None):
+    def __init__(self, db_path: Optional[str] = None, raw_storage: Optional[str] = None):
         if db_path is None:
             db_path = os.path.join(config.ROOT_DIR, "data", "internships.db")
         self.db_path = db_path
+        # "compressed": raw_data goes to zlib-compressed, hash-deduplicated
+        # side tables; "inline": raw JSON text in internships.raw_data
+        self.compress_raw = (raw_storage or config.RAW_DATA_STORAGE) == "compressed"
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
         self._init_db()
     
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def _open(self) -> sqlite3.Connection:
+        """A new connection with the configured pragmas applied."""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        # Always WAL: iter_internships reads on its own connection while
+        # callers keep writing on the thread's connection
+        conn.execute("PRAGMA journal_mode = WAL")
+        for name, value in (
+            ("synchronous", config.SQLITE_SYNCHRONOUS),
+            ("cache_size", config.SQLITE_CACHE_SIZE),
+            ("mmap_size", config.SQLITE_MMAP_SIZE),
+            ("temp_store", config.SQLITE_TEMP_STORE),
+        ):
+            if value:
+                conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+    
+    @contextmanager
+    def _connect(self, row_factory: Optional[Callable] = None) -> Iterator[sqlite3.Connection]:
+        """
+        Run a unit of work on this thread's long-lived connection. The work
+        is committed on success and rolled back on error; nested blocks
+        join the outermost one.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+            self._local.depth = 0
+            with self._lock:
+                self._connections.append(conn)
+        previous = conn.row_factory
+        conn.row_factory = row_factory
+        self._local.depth += 1
+        try:
+            yield conn
+            if self._local.depth == 1:
+                conn.commit()
+        except BaseException:
+            if self._local.depth == 1:
+                conn.rollback()
+            raise
+        finally:
+            self._local.depth -= 1
+            conn.row_factory = previous
+    
+    def optimize(self) -> None:
+        """Refresh query planner statistics that have gone stale (run after ingest)."""
+        with self._connect() as conn:
+            conn.execute("PRAGMA optimize")
+    
+    def close(self) -> None:
+        """Optimize and close every connection. The object reconnects if used again."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.execute("PRAGMA optimize")
+            finally:
+                conn.close()
+        self._local = threading.local()
+    
     def _init_db(self):
         """Initialize the database with required tables"""
         db_dir = os.path.dirname(self.db_path)
         if db_dir:  # Only create directory if path has a directory component
             os.makedirs(db_dir, exist_ok=True)
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS internships (
                     id INTEGER PRIMARY KEY,
@@ -42,6 +407,10 @@ class InternshipDB:
                     url TEXT,
                     views INTEGER,
                     registrations INTEGER,
+                    start_at INTEGER,
+                    end_at INTEGER,
+                    deadline_at INTEGER,
+                    content_hash TEXT,
                     raw_data TEXT,
                     scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP
@@ -49,90 +418,195 @@ class InternshipDB:
             """)
             
             conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_unstop_id ON internships(unstop_id)
+                CREATE INDEX IF NOT EXISTS idx_scraped_at ON internships(scraped_at)
             """)
             
+            # Monthly shard export groups and filters by this expression
             conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_scraped_at ON internships(scraped_at)
+                CREATE INDEX IF NOT EXISTS idx_first_seen_month ON internships(strftime('%Y-%m', first_seen))
             """)
             
-            conn.commit()
-            logging.info(f"Database initialized at {self.db_path}")
-    
-    def add_internship(self, item: Dict[str, Any]) -> bool:
-        """
-        Add internship to database if it doesn't exist.
-        Returns True if added, False if duplicate.
-        """
-        unstop_id = str(item.get("id") or item.get("entity_id") or "")
-        
-        if not unstop_id:
-            logging.warning("Skipping item without ID")
-            return False
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS crawl_state (
+                    run_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL DEFAULT 'running',
+                    last_page INTEGER NOT NULL DEFAULT 0,
+                    high_water TEXT,
+                    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS raw_payloads (
+                    hash TEXT PRIMARY KEY,
+                    data BLOB NOT NULL
+                ) WITHOUT ROWID
+            """)
+            
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS internship_raw (
+                    unstop_id TEXT PRIMARY KEY,
+                    hash TEXT NOT NULL
+                ) WITHOUT ROWID
+            """)
+            
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS internship_snapshots (
+                    unstop_id TEXT NOT NULL,
+                    observed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    views INTEGER,
+                    registrations INTEGER,
+                    PRIMARY KEY (unstop_id, observed_at)
+                ) WITHOUT ROWID
+            """)
+            
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rollups (
+                    dimension TEXT NOT NULL,
+                    key TEXT NOT NULL COLLATE NOCASE,
+                    value INTEGER NOT NULL,
+                    PRIMARY KEY (dimension, key)
+                ) WITHOUT ROWID
+            """)
+            
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS digest_state (
+                    name TEXT PRIMARY KEY,
+                    last_id INTEGER NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS digest_entries (
+                    unstop_id TEXT PRIMARY KEY,
+                    content_hash TEXT NOT NULL,
+                    entry TEXT NOT NULL
+                ) WITHOUT ROWID
+            """)
+            
+            for table, junction, key, _ in FACETS + (("companies", None, None, None),):
+                conn.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        id INTEGER PRIMARY KEY,
+                        name TEXT NOT NULL UNIQUE COLLATE NOCASE
+                    )
+                """)
+                if junction:
+                    conn.execute(f"""
+                        CREATE TABLE IF NOT EXISTS {junction} (
+                            {key} INTEGER NOT NULL,
+                            internship_id INTEGER NOT NULL,
+                            PRIMARY KEY ({key}, internship_id)
+                        ) WITHOUT ROWID
+                    """)
+                    conn.execute(
+                        f"CREATE INDEX IF NOT EXISTS idx_{junction}_internship ON {junction}(internship_id)"
+                    )
+            
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(internships)")}
+            for column, column_type in ADDED_COLUMNS:
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE internships ADD COLUMN {column} {column_type}")
+            
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_deadline_at ON internships(deadline_at)
+            """)
+            
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_company_id ON internships(company_id)
+            """)
+            
+            # Rows still holding inline raw_data; empty once compressed
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_inline_raw_data ON internships(id) WHERE raw_data IS NOT NULL
+            """)
+            
+            conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS internships_fts USING fts5(
+                    title, company_name, skills, location, details,
+                    tokenize = 'unicode61 remove_diacritics 2'
+                )
+            """)
+            
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            inline = conn.execute("SELECT 1 FROM internships WHERE raw_data IS NOT NULL LIMIT 1").fetchone()
         
-        # Extract and normalize data
-        title = item.get("title") or item.get("opportunity_title") or "Unknown"
-        company_name = item.get("organisation_name") or item.get("company_name") or "Unknown"
-        logo_url = item.get("logo_url") or item.get("organisation_logo") or ""
-        opportunity_type = item.get("type") or item.get("opportunity_type") or "internship"
+        # Also catches compression being switched on after the first open
+        if self.compress_raw and inline:
+            self.compact_raw_data()
         
-        # Stipend
-        stipend_min = item.get("stipend", {}).get("min") if isinstance(item.get("stipend"), dict) else None
-        stipend_max = item.get("stipend", {}).get("max") if isinstance(item.get("stipend"), dict) else None
-        currency = item.get("stipend", {}).get("currency") if isinstance(item.get("stipend"), dict) else "INR"
+        if version < 1:
+            with self._connect() as conn:
+                conn.execute("PRAGMA user_version = 1")
         
-        # Duration
-        duration = item.get("duration") or item.get("internship_duration") or ""
+        if version < 2:
+            self.rebuild_search_index()
+            with self._connect() as conn:
+                conn.execute("PRAGMA user_version = 2")
         
-        # Location
-        location_data = item.get("locations") or []
-        if isinstance(location_data, list) and location_data:
-            location = ", ".join([loc.get("location") or loc.get("city") or str(loc) for loc in location_data[:3]])
-        else:
-            location = str(location_data) if location_data else ""
+        if version < 3:
+            self.rebuild_rollups()
+            with self._connect() as conn:
+                conn.execute("PRAGMA user_version = 3")
         
-        work_from_home = 1 if item.get("is_work_from_home") or item.get("work_from_home") else 0
+        if version < 4:
+            self._backfill_epochs()
+            with self._connect() as conn:
+                conn.execute("PRAGMA user_version = 4")
         
-        # Skills
-        skills_data = item.get("skills_required") or item.get("skills") or []
-        if isinstance(skills_data, list):
-            skills = ", ".join([s.get("skill") or s.get("name") or str(s) for s in skills_data if s])
-        else:
-            skills = str(skills_data) if skills_data else ""
+        if version < 5:
+            self.rebuild_facets()
+            self.rebuild_rollups()
+            with self._connect() as conn:
+                conn.execute("PRAGMA user_version = 5")
         
-        # Dates
-        start_date = item.get("start_date") or item.get("registration_start_date") or ""
-        end_date = item.get("end_date") or item.get("registration_end_date") or ""
-        deadline = item.get("deadline") or item.get("registration_end_date") or ""
+        if version < 6:
+            # unstop_id already has the index behind its UNIQUE constraint
+            with self._connect() as conn:
+                conn.execute("DROP INDEX IF EXISTS idx_unstop_id")
+                conn.execute("ANALYZE")
+                conn.execute("PRAGMA user_version = 6")
         
-        # URL
-        url = item.get("public_url") or item.get("url") or f"https://unstop.com/internships/{unstop_id}"
+        if version < 7:
+            # Rollup keys fold case like the skills/locations/companies tables
+            with self._connect() as conn:
+                conn.execute("DROP TABLE rollups")
+                conn.execute("""
+                    CREATE TABLE rollups (
+                        dimension TEXT NOT NULL,
+                        key TEXT NOT NULL COLLATE NOCASE,
+                        value INTEGER NOT NULL,
+                        PRIMARY KEY (dimension, key)
+                    ) WITHOUT ROWID
+                """)
+            self.rebuild_rollups()
+            with self._connect() as conn:
+                conn.execute("PRAGMA user_version = 7")
         
-        # Stats
-        views = item.get("views_count") or item.get("views") or 0
-        registrations = item.get("registrations_count") or item.get("registrations") or 0
+        logging.info(f"Database initialized at {self.db_path}")
+    
+    @staticmethod
+    def normalize_item(item: Dict[str, Any]) -> Optional[tuple]:
+        """Flatten an API item into a row tuple; see the module-level normalize_item."""
+        return normalize_item(item)
+    
+    def add_internship(self, item: Dict[str, Any]) -> bool:
+        """
+        Add internship to database if it doesn't exist.
+        Returns True if added, False if duplicate.
+        """
+        row = self.normalize_item(item)
+        if row is None:
+            logging.warning("Skipping item without ID")
+            return False
         
-        # Store raw JSON
-        raw_data = json.dumps(item, ensure_ascii=False)
+        title, company_name = row[1], row[2]
         
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute("""
-                    INSERT INTO internships (
-                        unstop_id, title, company_name, logo_url, type,
-                        stipend_min, stipend_max, currency, duration,
-                        location, work_from_home, skills,
-                        start_date, end_date, deadline, url,
-                        views, registrations, raw_data
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    unstop_id, title, company_name, logo_url, opportunity_type,
-                    stipend_min, stipend_max, currency, duration,
-                    location, work_from_home, skills,
-                    start_date, end_date, deadline, url,
-                    views, registrations, raw_data
-                ))
-                conn.commit()
+            with self._connect() as conn:
+                self._insert_rows(conn, [row], INSERT_SQL)
                 logging.info(f"Added new internship: {title} at {company_name}")
                 return True
         except sqlite3.IntegrityError:
@@ -142,75 +616,1088 @@ class InternshipDB:
             logging.error(f"Error adding internship: {e}")
             return False
     
+    def add_internships(self, items: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Add many internships in a single transaction.
+        Existing rows are left untouched (ON CONFLICT DO NOTHING).
+        Returns counts of new, duplicate and invalid (ID-less) items.
+        """
+        rows = []
+        invalid = 0
+        for item in items:
+            row = self.normalize_item(item)
+            if row is None:
+                invalid += 1
+            else:
+                rows.append(row)
+        
+        if invalid:
+            logging.warning(f"Skipped {invalid} items without ID")
+        
+        counts = self.add_rows(rows)
+        counts["invalid"] = invalid
+        return counts
+    
+    def add_rows(self, rows: List[tuple], upsert: Optional[bool] = None) -> Dict[str, int]:
+        """
+        Write rows produced by normalize_item in a single transaction.
+        
+        In upsert mode (default from INGEST_MODE) rows whose content hash is
+        unchanged are skipped without a write, changed rows get only their
+        differing columns updated (and scraped_at refreshed), and views /
+        registrations snapshots are appended to internship_snapshots.
+        Otherwise existing rows are left untouched.
+        
+        Returns counts of new, updated and duplicate (unchanged) rows.
+        """
+        if upsert is None:
+            upsert = config.INGEST_MODE == "upsert"
+        if not rows:
+            return {"new": 0, "updated": 0, "duplicate": 0}
+        
+        with metrics.timer("db.add_rows"), self._connect() as conn:
+            updated = 0
+            to_insert = rows
+            if upsert:
+                to_insert, updated = self._update_changed(conn, rows)
+            new = self._insert_rows(conn, to_insert, INSERT_SQL + " ON CONFLICT(unstop_id) DO NOTHING")
+            if upsert and to_insert:
+                self._record_snapshots(conn, to_insert)
+        
+        duplicate = len(rows) - new - updated
+        metrics.incr("db.rows_written", len(rows))
+        metrics.incr("db.rows_new", new)
+        metrics.incr("db.rows_updated", updated)
+        logging.info(f"Bulk write: {new} new, {updated} updated, {duplicate} unchanged")
+        return {"new": new, "updated": updated, "duplicate": duplicate}
+    
+    def _split_raw(self, rows: List[tuple]) -> Tuple[List[tuple], Dict[str, str], List[tuple], Dict[str, str]]:
+        """
+        Separate raw_data from rows when compressed storage is enabled.
+        Returns (rows, payloads by hash, (unstop_id, hash) links, raw JSON by unstop_id).
+        """
+        if not self.compress_raw:
+            return rows, {}, [], {row[0]: row[-1] for row in rows}
+        links = []
+        payloads = {}
+        stripped = []
+        for row in rows:
+            raw = row[-1]
+            digest = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+            payloads.setdefault(digest, raw)
+            links.append((row[0], digest))
+            stripped.append(row[:-1] + (None,))
+        return stripped, payloads, links, {unstop_id: payloads[digest] for unstop_id, digest in links}
+    
+    def _insert_rows(self, conn: sqlite3.Connection, rows: List[tuple], sql: str) -> int:
+        """
+        Run an internships INSERT for normalized rows, moving raw_data to the
+        compressed side tables when enabled. Returns the number of rows inserted.
+        """
+        if not rows:
+            return 0
+        
+        # Work out which rows are genuinely new so the rollups only count them
+        existing = set()
+        for batch in chunked([row[0] for row in rows], 500):
+            existing.update(u for (u,) in conn.execute(
+                f"SELECT unstop_id FROM internships WHERE unstop_id IN ({', '.join('?' for _ in batch)})", batch
+            ))
+        new_rows = []
+        for row in rows:
+            if row[0] not in existing:
+                existing.add(row[0])
+                new_rows.append(row)
+        if not new_rows:
+            if "ON CONFLICT" not in sql:
+                raise sqlite3.IntegrityError("UNIQUE constraint failed: internships.unstop_id")
+            return 0
+        
+        rows, payloads, links, raw_by_id = self._split_raw(new_rows)
+        
+        before = conn.total_changes
+        conn.executemany(sql, rows)
+        inserted = conn.total_changes - before
+        
+        if self.compress_raw:
+            self._store_payloads(conn, payloads, links)
+        self._index_new_rows(conn, raw_by_id)
+        self._link_rows(conn, new_rows)
+        self._apply_rollups(conn, _rollup_deltas(new_rows, 1, day=True))
+        return inserted
+    
+    def _update_changed(self, conn: sqlite3.Connection, rows: List[tuple]) -> Tuple[List[tuple], int]:
+        """
+        Update stored rows whose content hash differs, touching only the
+        columns that changed. Returns (rows not stored yet, number updated).
+        """
+        compare = INSERT_COLUMNS[:-1]
+        existing = {}
+        for batch in chunked([row[0] for row in rows], 500):
+            for stored in conn.execute(
+                f"SELECT {', '.join(compare)} FROM internships "
+                f"WHERE unstop_id IN ({', '.join('?' for _ in batch)})", batch
+            ):
+                existing[stored[0]] = stored
+        
+        fresh = []
+        changed = []
+        for row in rows:
+            stored = existing.get(row[0])
+            if stored is None:
+                fresh.append(row)
+            elif stored[HASH_INDEX] != row[HASH_INDEX]:
+                changed.append((row, stored))
+        if not changed:
+            return fresh, 0
+        
+        # Group updates by the set of columns that changed
+        updates: Dict[tuple, List[tuple]] = {}
+        for row, stored in changed:
+            diff = tuple(i for i in range(1, HASH_INDEX) if row[i] != stored[i])
+            updates.setdefault(diff, []).append(row)
+        
+        for diff, group in updates.items():
+            names = [INSERT_COLUMNS[i] for i in diff] + ["content_hash"]
+            if not self.compress_raw:
+                names.append("raw_data")
+            assignments = ", ".join(f"{name} = ?" for name in names)
+            # Compressed payloads live in raw_payloads; clear any inline copy
+            # left from before compression so it cannot shadow the new one
+            if self.compress_raw:
+                assignments += ", raw_data = NULL"
+            conn.executemany(
+                f"UPDATE internships SET {assignments}, scraped_at = CURRENT_TIMESTAMP WHERE unstop_id = ?",
+                [
+                    tuple(row[i] for i in diff) + (row[HASH_INDEX],)
+                    + ((row[-1],) if not self.compress_raw else ()) + (row[0],)
+                    for row in group
+                ],
+            )
+        
+        deltas = _rollup_deltas([stored for _, stored in changed], -1)
+        deltas.update(_rollup_deltas([row for row, _ in changed], 1))
+        self._apply_rollups(conn, deltas)
+        
+        changed_rows = [row for row, _ in changed]
+        _, payloads, links, raw_by_id = self._split_raw(changed_rows)
+        if self.compress_raw:
+            self._store_payloads(conn, payloads, links, replace=True)
+        
+        # Re-index changed listings
+        conn.executemany(
+            "DELETE FROM internships_fts WHERE rowid = (SELECT id FROM internships WHERE unstop_id = ?)",
+            [(row[0],) for row in changed_rows],
+        )
+        self._index_new_rows(conn, raw_by_id)
+        self._link_rows(conn, changed_rows, replace=True)
+        
+        self._record_snapshots(conn, [
+            row for row, stored in changed
+            if (row[VIEWS_INDEX], row[REGISTRATIONS_INDEX]) != (stored[VIEWS_INDEX], stored[REGISTRATIONS_INDEX])
+        ])
+        return fresh, len(changed)
+    
+    @staticmethod
+    def _record_snapshots(conn: sqlite3.Connection, rows: List[tuple]) -> None:
+        """Append a views/registrations snapshot for each row."""
+        conn.executemany(
+            "INSERT OR REPLACE INTO internship_snapshots (unstop_id, views, registrations) VALUES (?, ?, ?)",
+            [(row[0], row[VIEWS_INDEX], row[REGISTRATIONS_INDEX]) for row in rows],
+        )
+    
+    @staticmethod
+    def _apply_rollups(conn: sqlite3.Connection, deltas: Counter) -> None:
+        """Add deltas to the rollups table, dropping keys that reach zero."""
+        deltas = {key: value for key, value in deltas.items() if value}
+        if not deltas:
+            return
+        conn.executemany(
+            "INSERT INTO rollups (dimension, key, value) VALUES (?, ?, ?) "
+            "ON CONFLICT(dimension, key) DO UPDATE SET value = value + excluded.value",
+            [(dimension, key, value) for (dimension, key), value in deltas.items()],
+        )
+        conn.execute("DELETE FROM rollups WHERE value <= 0")
+    
+    def rebuild_rollups(self) -> None:
+        """Recompute every rollup from the internships table."""
+        columns = ["first_seen"] + [INSERT_COLUMNS[i] for i in ROLLUP_INDEXES]
+        with self._connect() as conn:
+            conn.execute("DELETE FROM rollups")
+            deltas = Counter()
+            for first_seen, *values in conn.execute(f"SELECT {', '.join(columns)} FROM internships"):
+                row = [None] * len(INSERT_COLUMNS)
+                for index, value in zip(ROLLUP_INDEXES, values):
+                    row[index] = value
+                deltas.update(_rollup_deltas([row], 1))
+                deltas[("day", (first_seen or "")[:10])] += 1
+            self._apply_rollups(conn, deltas)
+    
+    def get_snapshots(self, unstop_id: str) -> List[Dict[str, Any]]:
+        """views/registrations history for one listing, oldest first."""
+        with self._connect(sqlite3.Row) as conn:
+            rows = conn.execute(
+                "SELECT observed_at, views, registrations FROM internship_snapshots "
+                "WHERE unstop_id = ? ORDER BY observed_at",
+                (unstop_id,),
+            ).fetchall()
+            return [dict(row) for row in rows]
+    
+    @staticmethod
+    def _index_new_rows(conn: sqlite3.Connection, raw_by_id: Dict[str, str]) -> None:
+        """Add full-text entries for listings in raw_by_id that are not indexed yet."""
+        unstop_ids = list(raw_by_id)
+        for i in range(0, len(unstop_ids), 500):
+            batch = unstop_ids[i:i + 500]
+            missing = conn.execute(f"""
+                SELECT id, unstop_id, title, company_name, skills, location
+                FROM internships
+                WHERE unstop_id IN ({', '.join('?' for _ in batch)})
+                  AND NOT EXISTS (SELECT 1 FROM internships_fts f WHERE f.rowid = internships.id)
+            """, batch).fetchall()
+            conn.executemany(
+                "INSERT INTO internships_fts (rowid, title, company_name, skills, location, details) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (row[:1] + row[2:] + (_details_text(raw_by_id[row[1]]),) for row in missing),
+            )
+    
+    @staticmethod
+    def _store_payloads(
+        conn: sqlite3.Connection,
+        payloads: Dict[str, str],
+        links: List[tuple],
+        replace: bool = False,
+    ) -> None:
+        """
+        Store compressed payloads once per content hash and link them to
+        listings. Existing links are kept unless replace=True, in which case
+        payloads no longer linked to any listing are deleted.
+        """
+        replaced = set()
+        if replace:
+            for batch in chunked([unstop_id for unstop_id, _ in links], 500):
+                replaced.update(h for (h,) in conn.execute(
+                    f"SELECT hash FROM internship_raw WHERE unstop_id IN ({', '.join('?' for _ in batch)})", batch
+                ))
+        known = set()
+        digests = list(payloads)
+        for i in range(0, len(digests), 500):
+            batch = digests[i:i + 500]
+            known.update(h for (h,) in conn.execute(
+                f"SELECT hash FROM raw_payloads WHERE hash IN ({', '.join('?' for _ in batch)})", batch
+            ))
+        conn.executemany(
+            "INSERT OR IGNORE INTO raw_payloads (hash, data) VALUES (?, ?)",
+            ((h, zlib.compress(raw.encode("utf-8"), 9)) for h, raw in payloads.items() if h not in known),
+        )
+        conn.executemany(
+            f"INSERT OR {'REPLACE' if replace else 'IGNORE'} INTO internship_raw (unstop_id, hash) VALUES (?, ?)",
+            links,
+        )
+        replaced.difference_update(payloads)
+        for batch in chunked(list(replaced), 500):
+            conn.execute(
+                f"DELETE FROM raw_payloads WHERE hash IN ({', '.join('?' for _ in batch)}) "
+                "AND NOT EXISTS (SELECT 1 FROM internship_raw r WHERE r.hash = raw_payloads.hash)",
+                batch,
+            )
+    
+    def _link_rows(self, conn: sqlite3.Connection, rows: List[tuple], replace: bool = False) -> None:
+        """Link stored listings for normalized rows to their company, skills and locations."""
+        ids = {}
+        for batch in chunked([row[0] for row in rows], 500):
+            ids.update(conn.execute(
+                f"SELECT unstop_id, id FROM internships WHERE unstop_id IN ({', '.join('?' for _ in batch)})", batch
+            ))
+        self._link_facets(conn, [
+            (ids[row[0]], row[COMPANY_INDEX], row[SKILLS_INDEX], row[LOCATION_INDEX])
+            for row in rows if row[0] in ids
+        ], replace)
+    
+    @staticmethod
+    def _intern(conn: sqlite3.Connection, table: str, names: Iterable[str]) -> Dict[str, int]:
+        """IDs for names in a dimension table (inserting new ones), keyed by lowercase name."""
+        names = sorted(set(names))
+        conn.executemany(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)", ((name,) for name in names))
+        ids = {}
+        for batch in chunked(names, 500):
+            for row_id, name in conn.execute(
+                f"SELECT id, name FROM {table} WHERE name IN ({', '.join('?' for _ in batch)})", batch
+            ):
+                ids[name.lower()] = row_id
+        return ids
+    
+    def _link_facets(self, conn: sqlite3.Connection, entries: List[tuple], replace: bool = False) -> None:
+        """
+        Populate company_id and the skill/location junction tables from
+        (internship id, company, skills, location) entries. With replace=True
+        existing junction rows for those listings are dropped first.
+        """
+        if not entries:
+            return
+        companies = {entry[0]: entry[1] or "Unknown" for entry in entries}
+        company_ids = self._intern(conn, "companies", companies.values())
+        conn.executemany(
+            "UPDATE internships SET company_id = ? WHERE id = ?",
+            ((company_ids[name.lower()], internship_id) for internship_id, name in companies.items()),
+        )
+        for position, (table, junction, key, _) in enumerate(FACETS, start=2):
+            names = {entry[0]: _split_list(entry[position]) for entry in entries}
+            name_ids = self._intern(conn, table, (name for values in names.values() for name in values))
+            if replace:
+                conn.executemany(f"DELETE FROM {junction} WHERE internship_id = ?", ((i,) for i in names))
+            conn.executemany(
+                f"INSERT OR IGNORE INTO {junction} ({key}, internship_id) VALUES (?, ?)",
+                ((name_ids[name.lower()], internship_id)
+                 for internship_id, values in names.items() for name in values),
+            )
+    
+    def rebuild_facets(self) -> None:
+        """Recompute company_id and the skill/location links for every listing."""
+        with self._connect() as conn:
+            for _, junction, _, _ in FACETS:
+                conn.execute(f"DELETE FROM {junction}")
+            cursor = conn.execute("SELECT id, company_name, skills, location FROM internships")
+            while True:
+                entries = cursor.fetchmany(500)
+                if not entries:
+                    break
+                self._link_facets(conn, entries)
+    
+    def _backfill_epochs(self) -> None:
+        """Fill start_at/end_at/deadline_at from the stored date strings."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, start_date, end_date, deadline FROM internships WHERE deadline_at IS NULL"
+            ).fetchall()
+            conn.executemany(
+                "UPDATE internships SET start_at = ?, end_at = ?, deadline_at = ? WHERE id = ?",
+                [(to_epoch(start), to_epoch(end), to_epoch(deadline), row_id)
+                 for row_id, start, end, deadline in rows],
+            )
+    
+    def compact_raw_data(self, batch_size: int = 500) -> int:
+        """
+        Move inline raw_data text into the compressed side tables and VACUUM.
+        Safe to run repeatedly. Returns the number of rows migrated.
+        """
+        migrated = 0
+        with self._connect() as conn:
+            while True:
+                rows = conn.execute(
+                    "SELECT id, unstop_id, raw_data FROM internships WHERE raw_data IS NOT NULL LIMIT ?",
+                    (batch_size,),
+                ).fetchall()
+                if not rows:
+                    break
+                payloads = {}
+                links = []
+                for _, unstop_id, raw in rows:
+                    digest = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+                    payloads.setdefault(digest, raw)
+                    links.append((unstop_id, digest))
+                self._store_payloads(conn, payloads, links)
+                conn.executemany("UPDATE internships SET raw_data = NULL WHERE id = ?", ((r[0],) for r in rows))
+                migrated += len(rows)
+        
+        if migrated:
+            with self._connect() as conn:
+                conn.execute("VACUUM")
+            logging.info(f"Compressed raw_data for {migrated} internships")
+        return migrated
+    
     def get_all_internships(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """Get all internships, ordered by most recent first"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            
-            query = "SELECT * FROM internships ORDER BY scraped_at DESC"
-            if limit:
-                query += f" LIMIT {limit}"
-            
-            cursor = conn.execute(query)
-            rows = cursor.fetchall()
-            
-            return [dict(row) for row in rows]
+        return list(self.iter_internships(columns=ALL_COLUMNS, limit=limit))
+    
+    def iter_internships(
+        self,
+        columns: Optional[Iterable[str]] = None,
+        batch_size: int = 500,
+        after: Optional[tuple] = None,
+        limit: Optional[int] = None,
+        min_id: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield internships lazily, most recent first (scraped_at, id).
+        
+        Args:
+            columns: Columns to select; defaults to everything except raw_data.
+                id and scraped_at are always included. raw_data is returned
+                as JSON text whether it is stored inline or compressed.
+            batch_size: Rows fetched from SQLite per round trip.
+            after: (scraped_at, id) of the last row already seen; only rows
+                after it are yielded (keyset pagination).
+            limit: Maximum number of rows to yield.
+            min_id: Only rows with a larger id, i.e. stored after that row.
+        """
+        query, params = self._select_sql(columns, after, limit, min_id)
+        
+        # A separate connection (WAL), so callers can write while iterating
+        conn = self._open()
+        conn.row_factory = sqlite3.Row
+        try:
+            yield from _fetch_rows(conn.execute(query, params), batch_size)
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def _select_sql(
+        columns: Optional[Iterable[str]],
+        after: Optional[tuple] = None,
+        limit: Optional[int] = None,
+        min_id: Optional[int] = None,
+    ) -> Tuple[str, tuple]:
+        """Build the SELECT used by iter_internships."""
+        columns = list(columns) if columns is not None else list(DEFAULT_COLUMNS)
+        unknown = set(columns) - set(ALL_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(sorted(unknown))}")
+        for key in ("scraped_at", "id"):
+            if key not in columns:
+                columns.append(key)
+        
+        select = [
+            "COALESCE(i.raw_data, p.data) AS raw_data" if c == "raw_data" else f"i.{c}"
+            for c in columns
+        ]
+        query = f"SELECT {', '.join(select)} FROM internships i"
+        if "raw_data" in columns:
+            query += (
+                " LEFT JOIN internship_raw r ON r.unstop_id = i.unstop_id"
+                " LEFT JOIN raw_payloads p ON p.hash = r.hash"
+            )
+        clauses = []
+        params = ()
+        if after is not None:
+            clauses.append("(i.scraped_at, i.id) < (?, ?)")
+            params += tuple(after)
+        if min_id is not None:
+            clauses.append("i.id > ?")
+            params += (int(min_id),)
+        if clauses:
+            query += f" WHERE {' AND '.join(clauses)}"
+        query += " ORDER BY i.scraped_at DESC, i.id DESC"
+        if limit:
+            query += " LIMIT ?"
+            params += (int(limit),)
+        return query, params
+    
+    @staticmethod
+    def _web_item(item: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a database row to the web-friendly format"""
+        return {
+            "id": item["unstop_id"],
+            "title": item["title"],
+            "company": item["company_name"],
+            "logo": item["logo_url"],
+            "type": item["type"],
+            "stipend": {
+                "min": item["stipend_min"],
+                "max": item["stipend_max"],
+                "currency": item["currency"]
+            } if item["stipend_min"] or item["stipend_max"] else None,
+            "duration": item["duration"],
+            "location": item["location"],
+            "workFromHome": bool(item["work_from_home"]),
+            "skills": item["skills"].split(", ") if item["skills"] else [],
+            "deadline": item["deadline"],
+            "url": item["url"],
+            "views": item["views"],
+            "registrations": item["registrations"],
+            "scrapedAt": item["scraped_at"],
+            "firstSeen": item["first_seen"]
+        }
     
     def export_to_json(self, output_path: str) -> int:
         """Export all internships to JSON file for web display"""
-        internships = self.get_all_internships()
-        
-        # Convert to web-friendly format
-        web_data = []
-        for item in internships:
-            web_item = {
-                "id": item["unstop_id"],
-                "title": item["title"],
-                "company": item["company_name"],
-                "logo": item["logo_url"],
-                "type": item["type"],
-                "stipend": {
-                    "min": item["stipend_min"],
-                    "max": item["stipend_max"],
-                    "currency": item["currency"]
-                } if item["stipend_min"] or item["stipend_max"] else None,
-                "duration": item["duration"],
-                "location": item["location"],
-                "workFromHome": bool(item["work_from_home"]),
-                "skills": item["skills"].split(", ") if item["skills"] else [],
-                "deadline": item["deadline"],
-                "url": item["url"],
-                "views": item["views"],
-                "registrations": item["registrations"],
-                "scrapedAt": item["scraped_at"],
-                "firstSeen": item["first_seen"]
-            }
-            web_data.append(web_item)
-        
         # Create directory if it has a parent
         output_dir = os.path.dirname(output_path)
         if output_dir:
             os.makedirs(output_dir, exist_ok=True)
         
+        # Stream rows straight into the file, one web item per line
+        count = 0
         with open(output_path, "w", encoding="utf-8") as f:
+            f.write('{"lastUpdated": %s,\n"internships": [' % json.dumps(datetime.utcnow().isoformat() + "Z"))
+            for item in self.iter_internships(columns=WEB_COLUMNS):
+                f.write(",\n" if count else "\n")
+                f.write(json.dumps(self._web_item(item), ensure_ascii=False))
+                count += 1
+            f.write('\n],\n"totalInternships": %d}\n' % count)
+        
+        logging.info(f"Exported {count} internships to {output_path}")
+        return count
+    
+    def export_columnar(self, output_path: str) -> int:
+        """
+        Export internships for the web as one array per field, plus row
+        orders for every sort option of docs/app.js and ascending row lists
+        for the type and work-from-home filters, so the page can filter and
+        sort without re-sorting or building objects per listing:
+        {"lastUpdated", "totalInternships", "columns": {field: [...]},
+         "sorts": {key: [row, ...]}, "facets": {"type": {type: [row, ...]}, "workFromHome": [row, ...]}}
+        Returns the number of internships exported.
+        """
+        columns: Dict[str, List[Any]] = {field: [] for field in COLUMNAR_FIELDS}
+        types: Dict[str, List[int]] = {}
+        work_from_home = []
+        stipends = []
+        count = 0
+        for row, item in enumerate(self.iter_internships(columns=WEB_COLUMNS)):
+            web = self._web_item(item)
+            stipend = web["stipend"] or {}
+            web["stipendMin"] = stipend.get("min")
+            web["stipendMax"] = stipend.get("max")
+            web["currency"] = stipend.get("currency")
+            for field in COLUMNAR_FIELDS:
+                columns[field].append(web[field])
+            types.setdefault(web["type"] or "", []).append(row)
+            if web["workFromHome"]:
+                work_from_home.append(row)
+            stipends.append(_as_int(web["stipendMax"]) or _as_int(web["stipendMin"]) or 0)
+            count += 1
+        
+        # Stable descending orders, matching the sort options of the page
+        rows = range(count)
+        sorts = {
+            "recent": sorted(rows, key=lambda i: columns["scrapedAt"][i] or "", reverse=True),
+            "stipend-high": sorted(rows, key=lambda i: stipends[i], reverse=True),
+            "views": sorted(rows, key=lambda i: _as_int(columns["views"][i]) or 0, reverse=True),
+            "registrations": sorted(rows, key=lambda i: _as_int(columns["registrations"][i]) or 0, reverse=True),
+        }
+        
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        payload = json.dumps({
+            "lastUpdated": datetime.utcnow().isoformat() + "Z",
+            "totalInternships": count,
+            "columns": columns,
+            "sorts": sorts,
+            "facets": {"type": types, "workFromHome": work_from_home},
+        }, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        _write_precompressed(output_path, payload)
+        
+        logging.info(f"Exported {count} internships in columnar layout to {output_path}")
+        return count
+    
+    @staticmethod
+    def _month_fingerprints(conn: sqlite3.Connection) -> List[Tuple[Optional[str], str, int, str]]:
+        """
+        (month, key, count, fingerprint) per first_seen month, newest first.
+        The fingerprint changes whenever a row of the month is added,
+        removed or re-scraped.
+        """
+        months = conn.execute("""
+            SELECT strftime('%Y-%m', first_seen) AS month,
+                   COUNT(*) AS count, MAX(scraped_at) AS latest, TOTAL(id) AS ids
+            FROM internships GROUP BY month ORDER BY month DESC
+        """).fetchall()
+        return [
+            (month[0], month[0] or "unknown", month[1], f"{month[1]}:{month[2]}:{int(month[3])}")
+            for month in months
+        ]
+    
+    def export_shards(self, output_dir: str) -> int:
+        """
+        Export internships as compact, content-hashed monthly shards (by
+        first_seen) plus a manifest.json, with .gz/.br siblings.
+        Only months whose rows changed since the last export are re-read
+        and rewritten; stale shard files are removed.
+        Returns the total number of internships exported.
+        """
+        shard_dir = os.path.join(output_dir, "shards")
+        manifest_path = os.path.join(output_dir, "manifest.json")
+        os.makedirs(shard_dir, exist_ok=True)
+        
+        previous = {}
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                previous = {shard["key"]: shard for shard in json.load(f).get("shards", [])}
+        except (FileNotFoundError, ValueError):
+            pass
+        
+        shards = []
+        rewritten = 0
+        with self._connect(sqlite3.Row) as conn:
+            for month, key, count, fingerprint in self._month_fingerprints(conn):
+                old = previous.get(key)
+                if old and old.get("fingerprint") == fingerprint and os.path.exists(os.path.join(shard_dir, old["file"])):
+                    shards.append(old)
+                    continue
+                
+                rows = conn.execute(
+                    f"SELECT {', '.join(WEB_COLUMNS)} FROM internships "
+                    "WHERE strftime('%Y-%m', first_seen) IS ? ORDER BY scraped_at DESC",
+                    (month,),
+                )
+                payload = json.dumps(
+                    [self._web_item(dict(row)) for row in rows],
+                    ensure_ascii=False, separators=(",", ":"),
+                ).encode("utf-8")
+                digest = hashlib.sha256(payload).hexdigest()[:16]
+                filename = f"internships-{key}.{digest}.json"
+                _write_precompressed(os.path.join(shard_dir, filename), payload)
+                shards.append({
+                    "key": key,
+                    "file": filename,
+                    "count": count,
+                    "hash": digest,
+                    "fingerprint": fingerprint,
+                })
+                rewritten += 1
+        
+        # Drop shard files no longer referenced by the manifest
+        current = {shard["file"] for shard in shards}
+        for name in os.listdir(shard_dir):
+            base = name[:-3] if name.endswith((".gz", ".br")) else name
+            if base not in current:
+                os.remove(os.path.join(shard_dir, name))
+        
+        total = sum(shard["count"] for shard in shards)
+        with open(manifest_path, "w", encoding="utf-8") as f:
             json.dump({
                 "lastUpdated": datetime.utcnow().isoformat() + "Z",
-                "totalInternships": len(web_data),
-                "internships": web_data
-            }, f, ensure_ascii=False, indent=2)
-        
-        logging.info(f"Exported {len(web_data)} internships to {output_path}")
-        return len(web_data)
-    
-    def get_stats(self) -> Dict[str, Any]:
-        """Get database statistics"""
-        with sqlite3.connect(self.db_path) as conn:
-            total = conn.execute("SELECT COUNT(*) FROM internships").fetchone()[0]
-            today = conn.execute(
-                "SELECT COUNT(*) FROM internships WHERE DATE(scraped_at) = DATE('now')"
-            ).fetchone()[0]
+                "totalInternships": total,
+                "shards": shards
+            }, f, ensure_ascii=False, separators=(",", ":"))
+        
+        logging.info(f"Exported {total} internships in {len(shards)} shards ({rewritten} rewritten) to {output_dir}")
+        return total
+    
+    def export_parquet(self, output_dir: str, batch_size: int = 10000) -> int:
+        """
+        Export the normalized columns as a Parquet dataset partitioned by
+        first_seen month (output_dir/month=YYYY-MM/internships.parquet,
+        zstd-compressed) for analytics tools such as pyarrow, pandas or
+        DuckDB. Only months whose rows changed since the last export are
+        rewritten, all of them from one streaming query.
+        Returns the total number of internships in the dataset.
+        """
+        if pyarrow is None:
+            raise RuntimeError("The Parquet export requires pyarrow (pip install pyarrow)")
+        
+        manifest_path = os.path.join(output_dir, "_manifest.json")
+        os.makedirs(output_dir, exist_ok=True)
+        previous = {}
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                previous = {part["key"]: part for part in json.load(f).get("partitions", [])}
+        except (FileNotFoundError, ValueError):
+            pass
+        
+        partitions = []
+        changed = {}
+        with self._connect(sqlite3.Row) as conn:
+            for month, key, count, fingerprint in self._month_fingerprints(conn):
+                part = {"key": key, "file": f"month={key}/internships.parquet", "count": count, "fingerprint": fingerprint}
+                old = previous.get(key)
+                if not (old and old.get("fingerprint") == fingerprint and os.path.exists(os.path.join(output_dir, part["file"]))):
+                    changed[key] = part
+                partitions.append(part)
+            
+            if changed:
+                timestamps = ("scraped_at", "first_seen")
+                columns = ", ".join(
+                    f"CAST(strftime('%s', {column}) AS INTEGER) AS {column}" if column in timestamps else column
+                    for column in ANALYTICS_COLUMNS
+                )
+                months = [key for key in changed if key != "unknown"]
+                cursor = conn.execute(
+                    f"SELECT COALESCE(strftime('%Y-%m', first_seen), 'unknown') AS month, {columns} "
+                    f"FROM internships WHERE strftime('%Y-%m', first_seen) IN ({', '.join('?' for _ in months)})"
+                    f"{' OR first_seen IS NULL' if 'unknown' in changed else ''} ORDER BY month, id",
+                    months,
+                )
+                schema = _analytics_schema()
+                writer = None
+                key = None
+                try:
+                    while True:
+                        rows = cursor.fetchmany(batch_size)
+                        if not rows:
+                            break
+                        for month, group in itertools.groupby(rows, key=lambda row: row["month"]):
+                            if month != key:
+                                if writer is not None:
+                                    writer.close()
+                                    writer = None
+                                    os.replace(path + ".tmp", path)
+                                key = month
+                                path = os.path.join(output_dir, changed[month]["file"])
+                                os.makedirs(os.path.dirname(path), exist_ok=True)
+                                writer = pyarrow.parquet.ParquetWriter(path + ".tmp", schema, compression="zstd")
+                            writer.write_table(_analytics_table(list(group), schema))
+                    if writer is not None:
+                        writer.close()
+                        writer = None
+                        os.replace(path + ".tmp", path)
+                except BaseException:
+                    # Keep the previous partition file; the manifest is not
+                    # updated, so the month is retried on the next export
+                    if writer is not None:
+                        writer.close()
+                        os.remove(path + ".tmp")
+                    raise
+        
+        # Drop partitions for months no longer in the database
+        current = {part["key"] for part in partitions}
+        for name in os.listdir(output_dir):
+            if name.startswith("month=") and name[len("month="):] not in current:
+                shutil.rmtree(os.path.join(output_dir, name))
+        
+        total = sum(part["count"] for part in partitions)
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "lastUpdated": datetime.utcnow().isoformat() + "Z",
+                "totalInternships": total,
+                "partitions": partitions,
+            }, f, ensure_ascii=False, separators=(",", ":"))
+        
+        logging.info(
+            f"Exported {total} internships in {len(partitions)} Parquet partitions "
+            f"({len(changed)} rewritten) to {output_dir}"
+        )
+        return total
+    
+    def rebuild_search_index(self) -> int:
+        """Rebuild the FTS5 index from scratch. Returns the number of rows indexed."""
+        query, params = self._select_sql(["title", "company_name", "skills", "location", "raw_data"])
+        count = 0
+        with self._connect(sqlite3.Row) as conn:
+            conn.execute("DELETE FROM internships_fts")
+            # Read and write on one connection so the scan doesn't block the writes
+            rows = _fetch_rows(conn.execute(query, params), 500)
+            for chunk in chunked(rows, 500):
+                conn.executemany(
+                    "INSERT INTO internships_fts (rowid, title, company_name, skills, location, details) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(
+                        row["id"], row["title"], row["company_name"], row["skills"], row["location"],
+                        _details_text(row["raw_data"]),
+                    ) for row in chunk],
+                )
+                count += len(chunk)
+            conn.execute("INSERT INTO internships_fts (internships_fts) VALUES ('optimize')")
+        if count:
+            logging.info(f"Indexed {count} internships for full-text search")
+        return count
+    
+    def search(
+        self,
+        query: str,
+        filters: Optional[Dict[str, Any]] = None,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """
+        Full-text search over title, company, skills, location and details,
+        ranked by BM25 (title matches weigh most). Every word in `query` must
+        match, as a prefix.
+        
+        Args:
+            query: Free text; FTS syntax characters are ignored.
+            filters: Optional type, work_from_home, min_stipend, company.
+            limit: Maximum number of results.
+        """
+        terms = _tokenize(query)
+        if not terms:
+            return []
+        match = " ".join(f'"{term}"*' for term in terms)
+        
+        clauses = ["internships_fts MATCH ?"]
+        params: List[Any] = [match]
+        for key, value in (filters or {}).items():
+            if value is None:
+                continue
+            if key == "type":
+                clauses.append("i.type = ?")
+            elif key == "work_from_home":
+                clauses.append("i.work_from_home = ?")
+                value = 1 if value else 0
+            elif key == "min_stipend":
+                clauses.append("COALESCE(i.stipend_max, i.stipend_min, 0) >= ?")
+            elif key == "company":
+                clauses.append("i.company_name = ? COLLATE NOCASE")
+            else:
+                raise ValueError(f"Unknown search filter: {key}")
+            params.append(value)
+        params.append(int(limit))
+        
+        with self._connect(sqlite3.Row) as conn:
+            rows = conn.execute(f"""
+                SELECT {', '.join('i.' + c for c in DEFAULT_COLUMNS)},
+                       bm25(internships_fts, 10.0, 5.0, 3.0, 2.0, 1.0) AS score
+                FROM internships_fts
+                JOIN internships i ON i.id = internships_fts.rowid
+                WHERE {' AND '.join(clauses)}
+                ORDER BY score
+                LIMIT ?
+            """, params).fetchall()
+            return [dict(row) for row in rows]
+    
+    def query(
+        self,
+        skills: Optional[Iterable[str]] = None,
+        locations: Optional[Iterable[str]] = None,
+        companies: Optional[Iterable[str]] = None,
+        wfh: Optional[bool] = None,
+        min_stipend: Optional[int] = None,
+        limit: Optional[int] = 50,
+    ) -> List[Dict[str, Any]]:
+        """
+        Faceted lookup through the normalized dimension tables, most recent
+        first. Names match case-insensitively. A listing must have every
+        requested skill and at least one of the requested locations and
+        companies.
+        """
+        skills = [name for name in skills or [] if name]
+        clauses = []
+        params: List[Any] = []
+        with self._connect(sqlite3.Row) as conn:
+            
+            def resolve(table: str, names: Iterable[str]) -> Optional[List[int]]:
+                names = [name for name in names if name]
+                if not names:
+                    return None
+                rows = conn.execute(
+                    f"SELECT id FROM {table} WHERE name IN ({', '.join('?' for _ in names)})", names
+                ).fetchall()
+                return [row[0] for row in rows]
+            
+            skill_ids = resolve("skills", skills)
+            if skill_ids is not None:
+                if len(skill_ids) < len({name.lower() for name in skills}):
+                    return []
+                clauses.append(
+                    f"i.id IN (SELECT internship_id FROM internship_skills "
+                    f"WHERE skill_id IN ({', '.join('?' for _ in skill_ids)}) "
+                    f"GROUP BY internship_id HAVING COUNT(*) = ?)"
+                )
+                params.extend(skill_ids + [len(skill_ids)])
+            
+            location_ids = resolve("locations", locations or [])
+            if location_ids is not None:
+                if not location_ids:
+                    return []
+                clauses.append(
+                    f"i.id IN (SELECT internship_id FROM internship_locations "
+                    f"WHERE location_id IN ({', '.join('?' for _ in location_ids)}))"
+                )
+                params.extend(location_ids)
+            
+            company_ids = resolve("companies", companies or [])
+            if company_ids is not None:
+                if not company_ids:
+                    return []
+                clauses.append(f"i.company_id IN ({', '.join('?' for _ in company_ids)})")
+                params.extend(company_ids)
+            
+            if wfh is not None:
+                clauses.append("i.work_from_home = ?")
+                params.append(1 if wfh else 0)
+            if min_stipend is not None:
+                clauses.append("COALESCE(i.stipend_max, i.stipend_min, 0) >= ?")
+                params.append(min_stipend)
+            
+            sql = f"SELECT {', '.join('i.' + c for c in DEFAULT_COLUMNS)} FROM internships i"
+            if clauses:
+                sql += f" WHERE {' AND '.join(clauses)}"
+            sql += " ORDER BY i.scraped_at DESC, i.id DESC"
+            if limit:
+                sql += " LIMIT ?"
+                params.append(int(limit))
+            return [dict(row) for row in conn.execute(sql, params)]
+    
+    def get_facets(self, limit: int = 50) -> Dict[str, Dict[str, int]]:
+        """Listing counts per skill, location and company (largest first), from the rollups."""
+        facets = {}
+        with self._connect() as conn:
+            for name, dimension in (("skills", "skill"), ("locations", "location"), ("companies", "company")):
+                facets[name] = dict(conn.execute(
+                    "SELECT key, value FROM rollups WHERE dimension = ? ORDER BY value DESC, key LIMIT ?",
+                    (dimension, limit),
+                ))
+        return facets
+    
+    def export_search_index(self, output_path: str) -> int:
+        """
+        Write a compact inverted index for client-side search:
+        {"ids": [unstop_id, ...], "terms": {term: [position in ids, ...]}}
+        built from title, company, skills and location.
+        Returns the number of distinct terms.
+        """
+        ids = []
+        terms: Dict[str, List[int]] = {}
+        columns = ["unstop_id", "title", "company_name", "skills", "location"]
+        for position, row in enumerate(self.iter_internships(columns=columns)):
+            ids.append(row["unstop_id"])
+            text = " ".join(row[c] or "" for c in columns[1:])
+            for term in set(_tokenize(text)):
+                terms.setdefault(term, []).append(position)
+        
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump({"ids": ids, "terms": terms}, f, ensure_ascii=False, separators=(",", ":"))
+        
+        logging.info(f"Exported search index with {len(terms)} terms to {output_path}")
+        return len(terms)
+    
+    def get_stats(self, detailed: bool = False) -> Dict[str, Any]:
+        """
+        Get database statistics from the precomputed rollups.
+        With detailed=True also returns daily additions (last 30 days), top
+        companies and skills, a stipend histogram and the WFH ratio.
+        """
+        with self._connect() as conn:
+            def rollup(dimension: str, key: str = "") -> int:
+                row = conn.execute(
+                    "SELECT value FROM rollups WHERE dimension = ? AND key = ?", (dimension, key)
+                ).fetchone()
+                return row[0] if row else 0
+            
+            def top(dimension: str, limit: int, by_key: bool = False) -> List[tuple]:
+                order = "key DESC" if by_key else "value DESC, key"
+                return conn.execute(
+                    f"SELECT key, value FROM rollups WHERE dimension = ? ORDER BY {order} LIMIT ?",
+                    (dimension, limit),
+                ).fetchall()
             
-            return {
+            total = rollup("total")
+            stats = {
                 "total_internships": total,
-                "added_today": today
+                "added_today": rollup("day", datetime.utcnow().strftime("%Y-%m-%d")),
             }
+            if not detailed:
+                return stats
+            
+            wfh = rollup("wfh")
+            stats.update({
+                "work_from_home": wfh,
+                "wfh_ratio": round(wfh / total, 4) if total else 0.0,
+                "daily": dict(sorted(top("day", 30, by_key=True))),
+                "top_companies": dict(top("company", 10)),
+                "top_skills": dict(top("skill", 15)),
+                "stipend_histogram": dict(sorted(
+                    conn.execute("SELECT key, value FROM rollups WHERE dimension = 'stipend'").fetchall(),
+                    key=lambda kv: int(kv[0].split("-")[0]),
+                )),
+            })
+            return stats
+    
+    def export_stats_json(self, output_path: str) -> Dict[str, Any]:
+        """Write detailed stats and facet counts as a compact JSON file for the site."""
+        stats = self.get_stats(detailed=True)
+        stats["facets"] = self.get_facets()
+        stats["lastUpdated"] = datetime.utcnow().isoformat() + "Z"
+        
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(stats, f, ensure_ascii=False, separators=(",", ":"))
+        return stats
+    
+    def get_raw_items(self, unstop_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Parsed raw API payloads for the given listings, keyed by unstop_id."""
+        items = {}
+        with self._connect() as conn:
+            for batch in chunked(list(unstop_ids), 500):
+                rows = conn.execute(f"""
+                    SELECT i.unstop_id, COALESCE(i.raw_data, p.data)
+                    FROM internships i
+                    LEFT JOIN internship_raw r ON r.unstop_id = i.unstop_id
+                    LEFT JOIN raw_payloads p ON p.hash = r.hash
+                    WHERE i.unstop_id IN ({', '.join('?' for _ in batch)})
+                """, batch)
+                for unstop_id, raw in rows:
+                    if isinstance(raw, bytes):
+                        raw = zlib.decompress(raw).decode("utf-8")
+                    items[unstop_id] = json.loads(raw) if raw else {}
+        return items
+    
+    def get_digest_entries(self, unstop_ids: Iterable[str]) -> Dict[str, Tuple[str, str]]:
+        """Cached digest entries as {unstop_id: (content_hash, entry)}."""
+        entries = {}
+        with self._connect() as conn:
+            for batch in chunked(list(unstop_ids), 500):
+                for unstop_id, content_hash, entry in conn.execute(
+                    f"SELECT unstop_id, content_hash, entry FROM digest_entries "
+                    f"WHERE unstop_id IN ({', '.join('?' for _ in batch)})", batch
+                ):
+                    entries[unstop_id] = (content_hash, entry)
+        return entries
+    
+    def save_digest_entries(self, entries: Iterable[Tuple[str, str, str]]) -> None:
+        """Cache rendered digest entries from (unstop_id, content_hash, entry) tuples."""
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO digest_entries (unstop_id, content_hash, entry) VALUES (?, ?, ?)",
+                entries,
+            )
+    
+    def get_digest_watermark(self, name: str = "whatsapp") -> int:
+        """Highest listing id included in the last digest of this name (0 if none)."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT last_id FROM digest_state WHERE name = ?", (name,)).fetchone()
+            return row[0] if row else 0
+    
+    def set_digest_watermark(self, last_id: int, name: str = "whatsapp") -> None:
+        """Record the highest listing id included in a digest."""
+        with self._connect() as conn:
+            conn.execute("""
+                INSERT INTO digest_state (name, last_id) VALUES (?, ?)
+                ON CONFLICT(name) DO UPDATE SET last_id = excluded.last_id, updated_at = CURRENT_TIMESTAMP
+            """, (name, last_id))
+    
+    def start_crawl(self, resume: bool = False) -> Dict[str, Any]:
+        """
+        Register a crawl run and return its state row.
+        With resume=True the most recent unfinished run is continued if
+        there is one; otherwise unfinished runs are marked abandoned.
+        """
+        with self._connect(sqlite3.Row) as conn:
+            if resume:
+                row = conn.execute(
+                    "SELECT * FROM crawl_state WHERE status = 'running' "
+                    "ORDER BY started_at DESC, rowid DESC LIMIT 1"
+                ).fetchone()
+                if row:
+                    logging.info(f"Resuming crawl {row['run_id']} from page {row['last_page']}")
+                    return dict(row)
+            
+            conn.execute("UPDATE crawl_state SET status = 'abandoned' WHERE status = 'running'")
+            run_id = uuid.uuid4().hex
+            conn.execute("INSERT INTO crawl_state (run_id) VALUES (?)", (run_id,))
+            return dict(conn.execute("SELECT * FROM crawl_state WHERE run_id = ?", (run_id,)).fetchone())
+    
+    def checkpoint_crawl(self, run_id: str, last_page: int, high_water: Optional[str] = None) -> None:
+        """Record progress for a running crawl. high_water only ever moves forward."""
+        with self._connect() as conn:
+            conn.execute("""
+                UPDATE crawl_state SET
+                    last_page = ?,
+                    high_water = CASE
+                        WHEN high_water IS NULL OR ? > high_water THEN COALESCE(?, high_water)
+                        ELSE high_water
+                    END,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE run_id = ?
+            """, (last_page, high_water, high_water, run_id))
+    
+    def finish_crawl(self, run_id: str) -> None:
+        """Mark a crawl as completed."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE crawl_state SET status = 'completed', updated_at = CURRENT_TIMESTAMP WHERE run_id = ?",
+                (run_id,),
+            )
+    
+    def get_high_water(self) -> Optional[str]:
+        """Newest item date (ISO 8601, UTC) stored by any completed crawl."""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT MAX(high_water) FROM crawl_state WHERE status = 'completed'"
+            ).fetchone()[0]
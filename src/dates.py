@@ -0,0 +1,70 @@
+"""
+Fast, memoized timestamp parsing shared by the scrape pipeline and the database.
+
+API timestamps are almost always ISO 8601, which datetime.fromisoformat
+handles natively; a few fixed formats are tried next, and dateutil is only
+used for anything stranger. Results are cached because the same strings
+(server_time, shared deadlines) repeat across a crawl.
+"""
+import datetime
+from functools import lru_cache
+from typing import Any, Optional
+from dateutil import parser
+
+# Month-first like dateutil's default, so the fast path never changes a result
+_FORMATS = (
+    "%Y-%m-%d %H:%M:%S",
+    "%m/%d/%Y %H:%M:%S",
+    "%m/%d/%Y",
+    "%m-%d-%Y",
+    "%d %b %Y",
+)
+
+
+@lru_cache(maxsize=65536)
+def _parse_string(value: str) -> Optional[datetime.datetime]:
+    text = value.strip()
+    if not text:
+        return None
+    if text[-1] in "Zz":
+        text = text[:-1] + "+00:00"
+    try:
+        dt = datetime.datetime.fromisoformat(text)
+    except ValueError:
+        for fmt in _FORMATS:
+            try:
+                dt = datetime.datetime.strptime(text, fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            try:
+                dt = parser.parse(value)
+            except (ValueError, OverflowError):
+                return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return dt
+
+
+def parse_timestamp(value: Any) -> Optional[datetime.datetime]:
+    """
+    Parse an API timestamp into an aware datetime (naive values are UTC).
+    Accepts strings and epoch seconds; returns None when unparseable.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        try:
+            return datetime.datetime.fromtimestamp(value, tz=datetime.timezone.utc)
+        except (OverflowError, OSError, ValueError):
+            return None
+    if isinstance(value, str):
+        return _parse_string(value)
+    return None
+
+
+def to_epoch(value: Any) -> Optional[int]:
+    """Epoch seconds (UTC) for an API timestamp, or None."""
+    dt = parse_timestamp(value)
+    return int(dt.timestamp()) if dt is not None else None
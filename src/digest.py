@@ -0,0 +1,184 @@
+"""
+WhatsApp digest of newly stored internships.
+
+Listings stored since the last digest (tracked by a watermark on the
+internships id) are rendered as WhatsApp-formatted entries and split into
+messages of at most DIGEST_MAX_CHARS. Rendered entries are cached per
+listing and reused until its content hash changes.
+
+    python -m src.digest                    # listings new since the last digest
+    python -m src.digest --all --no-advance # everything, without moving the watermark
+"""
+import argparse
+import sys
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from . import config, metrics
+from .database import InternshipDB
+from .utils import chunked, clean_html
+
+SUMMARY_LENGTH = 150
+ENTRY_SEPARATOR = "---------------------------------"
+# Between messages in the output file
+MESSAGE_SEPARATOR = "\n\n=================================\n\n"
+
+
+def render_entry(item: Dict[str, Any]) -> str:
+    """One digest entry for a raw API item."""
+    title = (item.get("title") or "Untitled Opportunity").strip()
+
+    # Summary: cleaned details, truncated
+    summary = clean_html(item.get("details") or "")
+    if len(summary) > SUMMARY_LENGTH:
+        summary = summary[:SUMMARY_LENGTH] + "..."
+
+    link = item.get("seo_url") or "#"
+
+    # Stipend is only shown for undergraduate listings
+    stipend_info = ""
+    if any(f.get("name") == "Undergraduate" for f in item.get("filters") or []):
+        job_detail = item.get("jobDetail") or {}
+        min_sal = job_detail.get("min_salary")
+        max_sal = job_detail.get("max_salary")
+        curr_sym = "₹" if "rupee" in str(job_detail.get("currency", "")).lower() else "$"
+        if min_sal and max_sal:
+            stipend_info = f"\n💰 *Stipend:* {curr_sym}{min_sal} - {curr_sym}{max_sal}"
+        elif min_sal:
+            stipend_info = f"\n💰 *Stipend:* {curr_sym}{min_sal}"
+        elif max_sal:
+            stipend_info = f"\n💰 *Stipend:* Up to {curr_sym}{max_sal}"
+
+    return (
+        f"📌 *{title}*\n"
+        f"_{summary}_\n"
+        f"🔗 Apply: {link}"
+        f"{stipend_info}\n\n"
+        f"{ENTRY_SEPARATOR}\n\n"
+    )
+
+
+def iter_entries(
+    db: InternshipDB,
+    since_id: int = 0,
+    batch_size: int = 500,
+    rendered: Optional[List[Tuple[str, str, str]]] = None,
+) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (id, entry) for listings stored after `since_id`, newest first.
+    Cached entries are reused when the content hash matches; raw payloads
+    are only loaded for the rest. Newly rendered (unstop_id, content_hash,
+    entry) tuples are appended to `rendered` so the caller can cache them
+    once the read is finished.
+    """
+    rows = db.iter_internships(["unstop_id", "content_hash"], batch_size=batch_size, min_id=since_id)
+    for batch in chunked(rows, batch_size):
+        hashes = {row["unstop_id"]: row["content_hash"] or "" for row in batch}
+        entries = {
+            unstop_id: entry
+            for unstop_id, (content_hash, entry) in db.get_digest_entries(hashes).items()
+            if content_hash == hashes[unstop_id]
+        }
+        misses = [row for row in batch if row["unstop_id"] not in entries]
+        if misses:
+            with metrics.timer("digest.render"):
+                items = db.get_raw_items(row["unstop_id"] for row in misses)
+                for row in misses:
+                    entry = render_entry(items.get(row["unstop_id"], {}))
+                    entries[row["unstop_id"]] = entry
+                    if rendered is not None:
+                        rendered.append((row["unstop_id"], row["content_hash"] or "", entry))
+        metrics.incr("digest.cache_hits", len(batch) - len(misses))
+        metrics.incr("digest.rendered", len(misses))
+        for row in batch:
+            yield row["id"], entries[row["unstop_id"]]
+
+
+def split_messages(entries: Iterable[str], title: str, max_chars: Optional[int] = None) -> List[str]:
+    """
+    Pack entries into messages of at most `max_chars` characters, each
+    starting with the title (numbered when there is more than one).
+    Entries are never split; an oversized entry gets a message of its own.
+    """
+    if max_chars is None:
+        max_chars = config.DIGEST_MAX_CHARS
+    # Room for the title, a " (12/34)" counter and the blank line after it
+    budget = max_chars - len(title) - 12
+
+    groups: List[List[str]] = []
+    current: List[str] = []
+    size = 0
+    for entry in entries:
+        if current and size + len(entry) > budget:
+            groups.append(current)
+            current, size = [], 0
+        current.append(entry)
+        size += len(entry)
+    if current:
+        groups.append(current)
+
+    if not groups:
+        return [f"{title}\n\nNo internships found for today."]
+    total = len(groups)
+    return [
+        f"{title}{f' ({number}/{total})' if total > 1 else ''}\n\n" + "".join(group).rstrip()
+        for number, group in enumerate(groups, start=1)
+    ]
+
+
+def build_digest(
+    db: InternshipDB,
+    since_id: Optional[int] = None,
+    max_chars: Optional[int] = None,
+) -> Tuple[List[str], int, int]:
+    """
+    Render the digest for listings stored after `since_id` (defaults to
+    the saved watermark). Returns (messages, item count, highest id seen).
+    """
+    if since_id is None:
+        since_id = db.get_digest_watermark()
+
+    last_id = since_id
+    count = 0
+    rendered: List[Tuple[str, str, str]] = []
+
+    def entries() -> Iterator[str]:
+        nonlocal last_id, count
+        for row_id, entry in iter_entries(db, since_id, rendered=rendered):
+            last_id = max(last_id, row_id)
+            count += 1
+            yield entry
+
+    title = f"*Internship Updates - {datetime.now().strftime('%d %B %Y')}*"
+    messages = split_messages(entries(), title, max_chars)
+    if rendered:
+        db.save_digest_entries(rendered)
+    return messages, count, last_id
+
+
+def write_digest(messages: List[str], output_path: str) -> None:
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(MESSAGE_SEPARATOR.join(messages) + "\n")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate the WhatsApp digest of new internships.")
+    parser.add_argument("--db", help="database path (defaults to data/internships.db)")
+    parser.add_argument("--output", default="digest_output.txt", help="file the messages are written to")
+    parser.add_argument("--all", action="store_true", help="include every listing, ignoring the watermark")
+    parser.add_argument("--no-advance", action="store_true", help="do not move the watermark forward")
+    parser.add_argument("--max-chars", type=int, help="maximum characters per message")
+    args = parser.parse_args(argv)
+
+    with InternshipDB(args.db) as db:
+        messages, count, last_id = build_digest(db, since_id=0 if args.all else None, max_chars=args.max_chars)
+        write_digest(messages, args.output)
+        if count and not args.no_advance:
+            db.set_digest_watermark(last_id)
+
+    print(f"Generated digest with {count} items in {len(messages)} message(s) in {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
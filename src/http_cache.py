@@ -0,0 +1,168 @@
+"""
+On-disk cache of API responses for conditional requests and offline replay.
+
+Each response body is stored zlib-compressed in SQLite with its ETag,
+Last-Modified and a SHA-256 of the body. api_client sends the validators
+back as If-None-Match / If-Modified-Since, and reuses the cached items on a
+304 or when a 200 body hashes the same as a page already parsed in this
+process. A 200 body that hashes the same as the stored copy is not
+compressed or rewritten again. On open, entries unused for longer than the
+TTL are evicted, then the least recently used ones until the cache fits its
+size cap; an offline cache is never evicted, so old caches can be replayed.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlencode
+
+# Parsed pages kept in memory, by body hash
+MEMO_SIZE = 256
+
+
+class ResponseCache:
+    """SQLite-backed response cache shared by all fetch workers."""
+
+    def __init__(self, path: str, ttl_seconds: float, max_bytes: int, offline: bool = False):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._memo: "OrderedDict[str, List[dict]]" = OrderedDict()
+
+        cache_dir = os.path.dirname(path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    body_hash TEXT NOT NULL,
+                    body BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    stored_at REAL NOT NULL,
+                    used_at REAL NOT NULL
+                ) WITHOUT ROWID
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_used_at ON responses(used_at)")
+            conn.commit()
+        if not offline:
+            self.evict()
+
+    def _connect(self) -> sqlite3.Connection:
+        # The cache is disposable, so skip fsyncs on every write
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous = OFF")
+        return conn
+
+    @staticmethod
+    def key(url: str, params: Dict[str, Any]) -> str:
+        """Canonical cache key for a GET request."""
+        return f"{url}{'&' if '?' in url else '?'}{urlencode(sorted(params.items()))}"
+
+    def _entry(self, key: str) -> Optional[tuple]:
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT etag, last_modified, body_hash, body FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+    def validators(self, key: str) -> Dict[str, str]:
+        """Conditional request headers for a cached response (empty if none)."""
+        with self._connect() as conn:
+            entry = conn.execute("SELECT etag, last_modified FROM responses WHERE key = ?", (key,)).fetchone()
+        headers = {}
+        if entry:
+            if entry[0]:
+                headers["If-None-Match"] = entry[0]
+            if entry[1]:
+                headers["If-Modified-Since"] = entry[1]
+        return headers
+
+    def load(self, key: str, parse: Callable[[Any], List[dict]]) -> Optional[List[dict]]:
+        """Items from the cached response for key, or None if not cached."""
+        entry = self._entry(key)
+        if entry is None:
+            return None
+        self._touch(key)
+        return self._parse(entry[2], lambda: zlib.decompress(entry[3]), parse)
+
+    def store(
+        self,
+        key: str,
+        body: bytes,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        parse: Callable[[Any], List[dict]],
+    ) -> List[dict]:
+        """Cache a 200 response and return its items."""
+        body_hash = hashlib.sha256(body).hexdigest()
+        items = self._parse(body_hash, lambda: body, parse)
+        now = time.time()
+        entry = self._entry(key)
+        if entry is not None and entry[2] == body_hash:
+            # Same body as the stored copy: only refresh validators and recency
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "UPDATE responses SET etag = ?, last_modified = ?, used_at = ? WHERE key = ?",
+                    (etag, last_modified, now, key),
+                )
+                conn.commit()
+            return items
+        compressed = zlib.compress(body, 6)
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, etag, last_modified, body_hash, body, size, stored_at, used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, etag, last_modified, body_hash, compressed, len(compressed), now, now),
+            )
+            conn.commit()
+        return items
+
+    def _parse(self, body_hash: str, body: Callable[[], bytes], parse: Callable[[Any], List[dict]]) -> List[dict]:
+        """Parse a body unless a page with the same hash was parsed already."""
+        with self._lock:
+            items = self._memo.get(body_hash)
+            if items is not None:
+                self._memo.move_to_end(body_hash)
+                return items
+        items = parse(json.loads(body()))
+        with self._lock:
+            self._memo[body_hash] = items
+            while len(self._memo) > MEMO_SIZE:
+                self._memo.popitem(last=False)
+        return items
+
+    def _touch(self, key: str) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("UPDATE responses SET used_at = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+
+    def evict(self) -> int:
+        """Drop expired entries, then the least recently used beyond the size cap."""
+        with self._lock, self._connect() as conn:
+            before = conn.total_changes
+            if self.ttl_seconds > 0:
+                conn.execute("DELETE FROM responses WHERE used_at < ?", (time.time() - self.ttl_seconds,))
+            total = conn.execute("SELECT TOTAL(size) FROM responses").fetchone()[0]
+            if self.max_bytes > 0 and total > self.max_bytes:
+                stale = []
+                for key, size in conn.execute("SELECT key, size FROM responses ORDER BY used_at"):
+                    if total <= self.max_bytes:
+                        break
+                    stale.append((key,))
+                    total -= size
+                conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+            conn.commit()
+            evicted = conn.total_changes - before
+        if evicted:
+            logging.info(f"Evicted {evicted} cached API responses")
+        return evicted
@@ -0,0 +1,156 @@
+"""
+Lightweight run instrumentation: counters and timers shared by every stage.
+
+    with metrics.timer("db.add_rows"):
+        ...
+    metrics.incr("http.bytes", len(body))
+
+snapshot() summarises a run (counts, totals, percentiles, derived rates);
+write_prometheus() renders the same data in the Prometheus textfile format.
+"""
+import cProfile
+import io
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Derived rates reported as counter / timer total (None: the run's wall-clock time)
+RATES = {
+    "db.rows_per_second": ("db.rows_written", "db.add_rows"),
+    "http.bytes_per_second": ("http.bytes", "http.request"),
+    "pipeline.items_per_second": ("pipeline.items_seen", None),
+}
+
+
+class Metrics:
+    """Thread-safe counters and duration samples."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters: Dict[str, float] = defaultdict(float)
+            self.samples: Dict[str, List[float]] = defaultdict(list)
+            self.started = time.time()
+
+    def incr(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] += value
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.samples[name].append(seconds)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Summary of everything recorded since the last reset."""
+        with self._lock:
+            counters = dict(self.counters)
+            samples = {name: sorted(values) for name, values in self.samples.items()}
+        timers = {}
+        for name, values in samples.items():
+            timers[name] = {
+                "count": len(values),
+                "total": round(sum(values), 6),
+                "min": round(values[0], 6),
+                "max": round(values[-1], 6),
+                "p50": round(_percentile(values, 0.50), 6),
+                "p90": round(_percentile(values, 0.90), 6),
+                "p99": round(_percentile(values, 0.99), 6),
+                "buckets": {str(bound): sum(1 for v in values if v <= bound) for bound in BUCKETS},
+            }
+        wall = time.time() - self.started
+        rates = {}
+        for rate, (counter, timer_name) in RATES.items():
+            total = wall if timer_name is None else timers.get(timer_name, {}).get("total")
+            if counters.get(counter) and total:
+                rates[rate] = round(counters[counter] / total, 1)
+        return {
+            "wall_seconds": round(wall, 3),
+            "counters": counters,
+            "timers": timers,
+            "rates": rates,
+        }
+
+    def write_prometheus(self, path: str, prefix: str = "internship_scraper") -> None:
+        """Write a Prometheus textfile-collector file (atomically replaced)."""
+        snap = self.snapshot()
+        lines = [f"{prefix}_run_wall_seconds {snap['wall_seconds']}"]
+        for name, value in sorted(snap["counters"].items()):
+            lines.append(f"{prefix}_{_metric_name(name)}_total {value}")
+        for name, timer in sorted(snap["timers"].items()):
+            metric = f"{prefix}_{_metric_name(name)}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for bound, count in timer["buckets"].items():
+                lines.append(f'{metric}_bucket{{le="{bound}"}} {count}')
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {timer["count"]}')
+            lines.append(f"{metric}_sum {timer['total']}")
+            lines.append(f"{metric}_count {timer['count']}")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+def _metric_name(name: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in name)
+
+
+registry = Metrics()
+incr = registry.incr
+observe = registry.observe
+timer = registry.timer
+
+
+@contextmanager
+def profiled(output_path: Optional[str] = None, top: int = 25) -> Iterator[None]:
+    """
+    Run the block under cProfile and tracemalloc, log the hottest functions
+    and biggest allocation sites, and save raw cProfile stats to output_path.
+    """
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        if output_path:
+            profiler.dump_stats(output_path)
+            logging.info(f"cProfile stats saved to {output_path}")
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(top)
+        logging.info("Profile (cumulative):\n" + stream.getvalue())
+
+        allocations = "\n".join(str(stat) for stat in snapshot.statistics("lineno")[:top])
+        logging.info(
+            f"Memory: current {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB\n"
+            f"Top allocations:\n{allocations}"
+        )
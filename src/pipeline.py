@@ -0,0 +1,151 @@
+"""
+Streaming scrape pipeline.
+
+fetch -> cutoff filter -> normalize -> batched DB write + backup (see backup_store)
+
+Every stage is a generator that pulls lazily from the previous one, so at
+most one page plus one chunk of items is held in memory, and every chunk is
+committed and flushed before the next one is fetched.
+"""
+import datetime
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from . import config, metrics
+from .backup_store import SegmentStore
+from .database import InternshipDB
+from .dates import parse_timestamp
+from .utils import chunked
+
+
+class Record(NamedTuple):
+    """An item moving through the pipeline."""
+    page: int
+    item: Dict[str, Any]
+    date: Optional[datetime.datetime]
+    row: Optional[tuple] = None
+    # Priority of the crawl target the item came from (higher wins)
+    priority: int = 0
+
+
+def _item_date(item: Dict[str, Any]) -> Optional[datetime.datetime]:
+    return parse_timestamp(item.get("approved_date") or item.get("server_time") or item.get("created_at"))
+
+
+def iter_recent(
+    pages: Iterable[Tuple[int, List[dict]]],
+    cutoff: datetime.datetime,
+    max_consecutive_old: int = 20,
+    high_water: Optional[datetime.datetime] = None,
+) -> Iterator[Record]:
+    """
+    Yield records for items newer than `cutoff` from (page, items) pairs.
+    Items without a parseable date are kept. Stops pulling pages once more
+    than `max_consecutive_old` old items were seen in a row or, when a
+    `high_water` mark is given, at the first item older than it.
+    """
+    consecutive_old_items = 0
+    for page, items in pages:
+        metrics.incr("pipeline.pages")
+        metrics.incr("pipeline.items_seen", len(items))
+        start = time.perf_counter()
+        dates = [_item_date(item) for item in items]
+        metrics.observe("pipeline.date_parse", time.perf_counter() - start)
+        for item, dt in zip(items, dates):
+            if dt is None:
+                yield Record(page, item, None)
+                continue
+            # Items at the mark itself are kept; the upsert skips the ones already stored
+            if high_water is not None and dt < high_water:
+                logging.info(f"Reached high-water mark on page {page}, stopping.")
+                return
+            if dt > cutoff:
+                consecutive_old_items = 0
+                yield Record(page, item, dt)
+            else:
+                consecutive_old_items += 1
+
+        if consecutive_old_items > max_consecutive_old:
+            logging.info(f"Reached old items limit on page {page}, stopping.")
+            return
+
+
+def normalize(records: Iterable[Record], db: InternshipDB) -> Iterator[Record]:
+    """Attach normalized DB rows to records, dropping items without an ID."""
+    for record in records:
+        row = db.normalize_item(record.item)
+        if row is None:
+            logging.warning("Skipping item without ID")
+            continue
+        yield record._replace(row=row)
+
+
+def unique(records: Iterable[Record]) -> Iterator[Record]:
+    """
+    Drop records whose listing was already seen earlier in the stream,
+    unless the new copy has a higher priority: that copy is passed on as
+    well, so the highest-priority version is the one stored last.
+    """
+    seen: Dict[str, int] = {}
+    for record in records:
+        previous = seen.get(record.row[0])
+        if previous is not None and record.priority <= previous:
+            metrics.incr("pipeline.duplicates_dropped")
+            continue
+        seen[record.row[0]] = record.priority
+        yield record
+
+
+def run(
+    pages: Iterable[Tuple[int, List[dict]]],
+    db: InternshipDB,
+    backup: Optional[SegmentStore] = None,
+    cutoff: Optional[datetime.datetime] = None,
+    chunk_size: Optional[int] = None,
+    high_water: Optional[datetime.datetime] = None,
+    checkpoint: Optional[Callable[[int, Optional[datetime.datetime]], None]] = None,
+) -> Dict[str, int]:
+    """
+    Drive the pipeline to completion and return item counts.
+    Each chunk is written to the database in one transaction and then to
+    the backup, so a crash loses at most the chunk in flight. After every
+    chunk, `checkpoint(page, newest_date)` is called with the page of the
+    last committed item.
+    """
+    if cutoff is None:
+        cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=config.HOURS_LOOKBACK)
+    return store(iter_recent(pages, cutoff, high_water=high_water), db, backup, chunk_size, checkpoint)
+
+
+def store(
+    records: Iterable[Record],
+    db: InternshipDB,
+    backup: Optional[SegmentStore] = None,
+    chunk_size: Optional[int] = None,
+    checkpoint: Optional[Callable[[int, Optional[datetime.datetime]], None]] = None,
+) -> Dict[str, int]:
+    """
+    Normalize, deduplicate and store already-filtered records; the write
+    half of run(), also used by the multi-target scheduler.
+    """
+    if chunk_size is None:
+        chunk_size = config.INGEST_CHUNK_SIZE
+
+    records = unique(normalize(records, db))
+    totals = {"items": 0, "new": 0, "updated": 0, "duplicate": 0}
+    for chunk in chunked(records, chunk_size):
+        # A higher-priority copy in the same chunk replaces the earlier one
+        latest = list({record.row[0]: record for record in chunk}.values())
+        counts = db.add_rows([record.row for record in latest])
+        if backup is not None:
+            backup.write(latest)
+        totals["items"] += len(latest)
+        totals["new"] += counts["new"]
+        totals["updated"] += counts["updated"]
+        totals["duplicate"] += counts["duplicate"]
+        logging.info(f"Committed chunk of {len(chunk)} items ({totals['items']} so far)")
+        if checkpoint is not None:
+            dates = [record.date for record in chunk if record.date is not None]
+            checkpoint(chunk[-1].page, max(dates) if dates else None)
+    return totals
@@ -1,91 +1,158 @@
+import argparse
 import datetime
 import json
 import os
-import time
 import logging
-from dateutil import parser
+from typing import List, Optional
 
 
-from . import config, api_client, utils
+from . import config, api_client, backup_store, metrics, pipeline, scheduler, utils
 from .database import InternshipDB
 
 
-def main() -> None:
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Scrape Unstop internships into the local database.")
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="continue the last unfinished crawl from its last checkpointed page",
+    )
+    parser.add_argument(
+        "--high-water", action="store_true",
+        help="stop paging at the first item older than the newest one already stored",
+    )
+    parser.add_argument(
+        "--targets", metavar="PATH", default=config.CRAWL_TARGETS_FILE or None,
+        help="JSON list of crawl targets to fetch concurrently (defaults to CRAWL_TARGETS_FILE)",
+    )
+    parser.add_argument(
+        "--offline", action="store_true",
+        help="serve every page from the HTTP response cache without touching the network",
+    )
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="run under cProfile and tracemalloc; stats are logged and saved to logs/",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
     utils.setup_logging()
     os.makedirs(config.DATA_DIR, exist_ok=True)
+    metrics.registry.reset()
+    if args.offline:
+        config.HTTP_CACHE_MODE = "offline"
 
-    db = InternshipDB()
-    
-    all_items = []
-    new_items = 0
-    duplicate_items = 0
-    page = 1
-    
+    if args.profile:
+        profile_path = os.path.join(
+            config.LOG_DIR, f"profile_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.prof"
+        )
+        with metrics.profiled(profile_path):
+            run(args)
+    else:
+        run(args)
+
+
+def run(args: argparse.Namespace) -> None:
+    # Closing checkpoints the WAL back into data/internships.db before it is committed
+    with InternshipDB() as db:
+        scrape(args, db)
+
+
+def scrape(args: argparse.Namespace, db: InternshipDB) -> None:
     cutoff_date = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=config.HOURS_LOOKBACK)
-    consecutive_old_items = 0
 
-    logging.info("Starting scraper...")
+    crawl = db.start_crawl(resume=args.resume)
+    run_id = crawl["run_id"]
+    start_page = max(crawl["last_page"], 1)
+
+    high_water = None
+    if args.high_water:
+        mark = db.get_high_water()
+        if mark:
+            high_water = datetime.datetime.fromisoformat(mark)
+            logging.info(f"Using high-water mark {mark}")
+
+    logging.info(f"Starting scraper (run {run_id}, page {start_page})...")
     
-    while True:
-        items = api_client.fetch_page(page)
-        if not items:
-            break
-        
-        for item in items:
-            date_str = item.get("approved_date") or item.get("server_time") or item.get("created_at")
-            if date_str:
-                try:
-                    dt = parser.parse(date_str)
-                    if dt.tzinfo is None:
-                        dt = dt.replace(tzinfo=datetime.timezone.utc)
-                    
-                    if dt > cutoff_date:
-                        all_items.append(item)
-                        consecutive_old_items = 0
-                    else:
-                        consecutive_old_items += 1
-                except Exception:
-                     all_items.append(item)
-            else:
-                all_items.append(item)
-
-        if consecutive_old_items > 20:
-            logging.info("Reached old items limit, stopping.")
-            break
-        
-        if page > 50:
-            logging.info("Reached max pages limit, stopping.")
-            break
-
-        page += 1
-        time.sleep(config.REQUEST_DELAY_SECONDS)
-
-    # Add to database with duplicate prevention
-    logging.info(f"Processing {len(all_items)} items...")
-    for item in all_items:
-        if db.add_internship(item):
-            new_items += 1
-        else:
-            duplicate_items += 1
+    def checkpoint(page: int, newest: Optional[datetime.datetime]) -> None:
+        newest_iso = newest.astimezone(datetime.timezone.utc).isoformat() if newest else None
+        db.checkpoint_crawl(run_id, page, newest_iso)
+
+    # Stream pages through the pipeline; each chunk is committed to the
+    # database and its changed payloads appended to today's backup segment
+    # as soon as it is ready.
+    today = datetime.date.today().isoformat()
+    if args.targets:
+        # Several feeds at once; pages and high-water marks are per feed, so
+        # progress is not checkpointed for --resume / --high-water.
+        if args.resume or args.high_water:
+            logging.warning("--resume and --high-water are ignored when crawling several targets")
+        targets = scheduler.load_targets(args.targets)
+        logging.info(f"Crawling {len(targets)} targets: {', '.join(t.name for t in targets)}")
+        records = scheduler.iter_records(targets)
+        try:
+            with backup_store.SegmentStore(day=today) as backup:
+                totals = pipeline.store(records, db, backup=backup)
+        finally:
+            records.close()
+    else:
+        pages = api_client.fetch_pages(start_page=start_page)
+        try:
+            with backup_store.SegmentStore(day=today) as backup:
+                totals = pipeline.run(
+                    pages, db, backup=backup, cutoff=cutoff_date,
+                    high_water=high_water, checkpoint=checkpoint,
+                )
+        finally:
+            pages.close()
+    db.finish_crawl(run_id)
+    db.optimize()
     
     # Export to JSON for web
-    web_json_path = os.path.join(config.ROOT_DIR, "docs", "data", "internships.json")
-    total_exported = db.export_to_json(web_json_path)
+    web_data_dir = os.path.join(config.ROOT_DIR, "docs", "data")
+    columnar_path = os.path.join(web_data_dir, "listings.json")
+    if config.WEB_EXPORT_MODE == "columnar":
+        with metrics.timer("export.columnar"):
+            total_exported = db.export_columnar(columnar_path)
+    elif config.WEB_EXPORT_MODE == "single":
+        with metrics.timer("export.json"):
+            total_exported = db.export_to_json(os.path.join(web_data_dir, "internships.json"))
+    else:
+        with metrics.timer("export.shards"):
+            total_exported = db.export_shards(web_data_dir)
+    if config.WEB_EXPORT_MODE != "columnar":
+        # The page prefers listings.json, so drop it when switching layouts
+        for path in (columnar_path, columnar_path + ".gz", columnar_path + ".br"):
+            if os.path.exists(path):
+                os.remove(path)
+    with metrics.timer("export.search_index"):
+        db.export_search_index(os.path.join(web_data_dir, "search-index.json"))
+    with metrics.timer("export.stats"):
+        db.export_stats_json(os.path.join(web_data_dir, "stats.json"))
+    if config.ANALYTICS_EXPORT_DIR:
+        try:
+            with metrics.timer("export.parquet"):
+                db.export_parquet(config.ANALYTICS_EXPORT_DIR)
+        except RuntimeError as e:
+            logging.warning(f"Skipping the analytics export: {e}")
     
-    # Also save daily backup
-    out_path = os.path.join(
-        config.DATA_DIR, f"internships_{datetime.date.today().isoformat()}.json"
-    )
-    with open(out_path, "w", encoding="utf-8") as f:
+    # Record the run report (summary and metrics) for the day
+    out_path = os.path.join(config.BACKUP_DIR, f"{today}.ndjson.gz")
+    meta_path = os.path.join(config.DATA_DIR, f"internships_{today}.meta.json")
+    with open(meta_path, "w", encoding="utf-8") as f:
         json.dump(
             {
                 "scrape_date": datetime.datetime.utcnow().isoformat() + "Z",
                 "hours_lookback": config.HOURS_LOOKBACK,
                 "per_page": config.API_PER_PAGE,
-                "total_items": len(all_items),
-                "new_items": new_items,
-                "duplicate_items": duplicate_items,
-                "items": all_items,
+                "total_items": totals["items"],
+                "new_items": totals["new"],
+                "updated_items": totals["updated"],
+                "duplicate_items": totals["duplicate"],
+                "run_id": run_id,
+                "backup": os.path.basename(out_path),
+                "metrics": metrics.registry.snapshot(),
             },
             f,
             ensure_ascii=False,
@@ -94,12 +161,17 @@ def main() -> None:
 
     stats = db.get_stats()
     logging.info(f"Scraping complete:")
-    logging.info(f"  - Found {len(all_items)} items from API")
-    logging.info(f"  - Added {new_items} new internships")
-    logging.info(f"  - Skipped {duplicate_items} duplicates")
+    logging.info(f"  - Found {totals['items']} items from API")
+    logging.info(f"  - Added {totals['new']} new internships")
+    logging.info(f"  - Updated {totals['updated']} changed internships")
+    logging.info(f"  - Skipped {totals['duplicate']} unchanged duplicates")
     logging.info(f"  - Total in database: {stats['total_internships']}")
     logging.info(f"  - Exported {total_exported} to web JSON")
     logging.info(f"  - Backup saved to {out_path}")
+    logging.info(f"  - Run report saved to {meta_path}")
+
+    if config.METRICS_PROMETHEUS_FILE:
+        metrics.registry.write_prometheus(config.METRICS_PROMETHEUS_FILE)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,73 @@
+"""
+Command-line full-text search over the internships database.
+
+    python -m src.search "python backend" --wfh --min-stipend 10000
+    python -m src.search --skill Python --location Bangalore
+    python -m src.search --export-index docs/data/search-index.json
+"""
+import argparse
+import sys
+from typing import List, Optional
+
+from .database import InternshipDB
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Search scraped internships (BM25 ranked).")
+    parser.add_argument("query", nargs="?", default="", help="words to search for")
+    parser.add_argument("--type", help="only this opportunity type")
+    parser.add_argument("--wfh", action="store_true", default=None, help="only work-from-home listings")
+    parser.add_argument("--min-stipend", type=int, help="minimum stipend")
+    parser.add_argument("--company", help="only this company")
+    parser.add_argument("--skill", action="append", default=[], help="required skill (repeatable)")
+    parser.add_argument("--location", action="append", default=[], help="location (repeatable, any matches)")
+    parser.add_argument("--limit", type=int, default=20, help="maximum number of results")
+    parser.add_argument("--db", help="database path (defaults to data/internships.db)")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the full-text index first")
+    parser.add_argument("--export-index", metavar="PATH", help="write the static-site search index and exit")
+    args = parser.parse_args(argv)
+
+    db = InternshipDB(args.db)
+    if args.rebuild:
+        db.rebuild_search_index()
+    if args.export_index:
+        terms = db.export_search_index(args.export_index)
+        print(f"Wrote {terms} terms to {args.export_index}")
+        return 0
+    if not args.query and not (args.skill or args.location):
+        parser.error("a query, --skill or --location is required unless --export-index is given")
+    if args.query and (args.skill or args.location):
+        parser.error("--skill/--location cannot be combined with a text query")
+    if args.type and not args.query:
+        parser.error("--type only applies to text queries")
+
+    if args.query:
+        filters = {
+            "type": args.type,
+            "work_from_home": args.wfh,
+            "min_stipend": args.min_stipend,
+            "company": args.company,
+        }
+        results = db.search(args.query, filters=filters, limit=args.limit)
+    else:
+        results = db.query(
+            skills=args.skill,
+            locations=args.location,
+            companies=[args.company] if args.company else None,
+            wfh=args.wfh,
+            min_stipend=args.min_stipend,
+            limit=args.limit,
+        )
+    for item in results:
+        stipend = item["stipend_max"] or item["stipend_min"]
+        print(f"{item['title']} | {item['company_name']} | {item['location'] or 'N/A'}"
+              f"{' | WFH' if item['work_from_home'] else ''}"
+              f"{f' | {stipend}' if stipend else ''}")
+        print(f"    {item['url']}")
+    if not results:
+        print("No matches.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,13 @@
+import html
 import logging
 import os
+import re
+from typing import Iterable, Iterator
 from . import config
 
+_TAG_RE = re.compile(r"<[^>]*>")
+
+
 def setup_logging() -> None:
     os.makedirs(config.LOG_DIR, exist_ok=True)
     logging.basicConfig(
@@ -12,3 +18,22 @@ def setup_logging() -> None:
             logging.StreamHandler(),
         ],
     )
+
+
+def clean_html(raw_html: str) -> str:
+    """Remove HTML tags and entities and collapse whitespace."""
+    if not raw_html:
+        return ""
+    return " ".join(html.unescape(_TAG_RE.sub(" ", raw_html)).split())
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    """Group an iterable into lists of at most `size` elements."""
+    chunk = []
+    for element in iterable:
+        chunk.append(element)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
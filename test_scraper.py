@@ -4,10 +4,15 @@ Test script to verify the scraper and database functionality
 import os
 import sys
 import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
+from src import api_client, backfill, backup_store, config, dates, digest, metrics, pipeline, scheduler
 from src.database import InternshipDB
 
 def test_database():
@@ -63,7 +68,7 @@ def test_database():
         print(f"✅ JSON contains {data['totalInternships']} internships")
     
     # Close database connection
-    del db
+    db.close()
     
     # Cleanup
     try:
@@ -76,9 +81,1087 @@ def test_database():
     
     return True
 
+def test_bulk_insert():
+    """Test single-transaction bulk ingest"""
+    print("🧪 Testing Bulk Insert\n")
+    
+    test_db_path = "test_bulk_internships.db"
+    if os.path.exists(test_db_path):
+        os.remove(test_db_path)
+    
+    db = InternshipDB(test_db_path)
+    
+    items = [{"id": f"bulk-{i}", "title": f"Intern {i}"} for i in range(50)]
+    items.append({"id": "bulk-0", "title": "Intern 0 again"})
+    items.append({"title": "No ID"})
+    
+    counts = db.add_internships(items)
+    assert counts == {"new": 50, "updated": 0, "duplicate": 1, "invalid": 1}, counts
+    print(f"✅ Bulk insert counts: {counts}")
+    
+    counts = db.add_internships(items[:10])
+    assert counts["new"] == 0 and counts["duplicate"] == 10, counts
+    print("✅ Re-ingest only reports duplicates")
+    
+    assert db.get_stats()["total_internships"] == 50
+    print("✅ Row count matches")
+    
+    db.close()
+    try:
+        os.remove(test_db_path)
+    except:
+        pass
+    
+    return True
+
+def test_fetch_pages():
+    """Test concurrent page fetching against a local stub server"""
+    print("🧪 Testing Concurrent Fetcher\n")
+    
+    throttled = set()
+    
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            page = int(parse_qs(urlparse(self.path).query)["page"][0])
+            if page == 2 and page not in throttled:
+                throttled.add(page)
+                self.send_response(429)
+                self.send_header("Retry-After", "0")
+                self.end_headers()
+                return
+            items = [{"id": f"p{page}-{i}"} for i in range(3)] if page <= 5 else []
+            body = json.dumps({"data": {"data": items}}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/api"
+    
+    config.RATE_LIMIT_PER_SECOND = 0
+    config.REQUEST_DELAY_SECONDS = 0
+    config.HTTP_CACHE_MODE = "off"
+    api_client._limiter = None
+    
+    try:
+        pages = list(api_client.fetch_pages(max_pages=10, concurrency=3, base_url=base_url))
+        assert [p for p, _ in pages] == [1, 2, 3, 4, 5], pages
+        assert pages[1][1][0]["id"] == "p2-0"
+        print("✅ Pages returned in order, stopping at first empty page")
+        print("✅ Throttled page retried after Retry-After")
+        
+        gen = api_client.fetch_pages(max_pages=10, concurrency=3, base_url=base_url)
+        first_page, _ = next(gen)
+        gen.close()
+        assert first_page == 1
+        print("✅ Early stop closes the fetcher")
+    finally:
+        server.shutdown()
+        server.server_close()
+    
+    return True
+
+def test_response_cache():
+    """Test conditional requests, offline replay and eviction"""
+    print("🧪 Testing Response Cache\n")
+    
+    requests_seen = []
+    
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests_seen.append(self.headers.get("If-None-Match"))
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = json.dumps({"data": {"data": [{"id": "c-1"}]}}).encode()
+            self.send_response(200)
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/api"
+    
+    cache_path = "test_http_cache.db"
+    if os.path.exists(cache_path):
+        os.remove(cache_path)
+    config.RATE_LIMIT_PER_SECOND = 0
+    config.HTTP_CACHE_PATH = cache_path
+    api_client._limiter = None
+    api_client._cache = None
+    
+    try:
+        config.HTTP_CACHE_MODE = "on"
+        assert api_client.fetch_page(1, base_url=base_url) == [{"id": "c-1"}]
+        metrics.registry.reset()
+        assert api_client.fetch_page(1, base_url=base_url) == [{"id": "c-1"}]
+        assert requests_seen == [None, '"v1"']
+        assert metrics.registry.snapshot()["counters"]["http.not_modified"] == 1
+        print("✅ Revalidated with If-None-Match and served the 304 from cache")
+        
+        config.HTTP_CACHE_MODE = "offline"
+        assert api_client.fetch_page(1, base_url=base_url) == [{"id": "c-1"}]
+        assert api_client.fetch_page(2, base_url=base_url) == []
+        assert len(requests_seen) == 2
+        print("✅ Offline mode replays the cache without network access")
+        
+        import sqlite3
+        from contextlib import closing
+        with closing(sqlite3.connect(cache_path)) as conn:
+            conn.execute("UPDATE responses SET used_at = 0, stored_at = 0")
+            conn.commit()
+        api_client._cache = None
+        assert api_client.fetch_page(1, base_url=base_url) == [{"id": "c-1"}]
+        print("✅ Offline replay keeps entries older than the TTL")
+        
+        cache = api_client._cache
+        with closing(sqlite3.connect(cache_path)) as conn:
+            key = conn.execute("SELECT key FROM responses").fetchone()[0]
+        body = json.dumps({"data": {"data": [{"id": "c-1"}]}}).encode()
+        assert cache.store(key, body, '"v2"', None, api_client._extract_items) == [{"id": "c-1"}]
+        assert cache.validators(key) == {"If-None-Match": '"v2"'}
+        with closing(sqlite3.connect(cache_path)) as conn:
+            assert conn.execute("SELECT stored_at FROM responses").fetchone()[0] == 0
+        print("✅ Identical bodies are not rewritten")
+        
+        api_client._cache.max_bytes = 1
+        assert api_client._cache.evict() == 1
+        print("✅ Size cap evicts least recently used responses")
+    finally:
+        config.HTTP_CACHE_MODE = "off"
+        api_client._cache = None
+        server.shutdown()
+        server.server_close()
+        try:
+            os.remove(cache_path)
+        except:
+            pass
+    
+    return True
+
+def test_scheduler():
+    """Test concurrent multi-target crawling with cross-target dedupe"""
+    print("🧪 Testing Crawl Scheduler\n")
+    
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)
+            page = int(query["page"][0])
+            category = query["opportunity"][0]
+            time.sleep(0.1)
+            # "jobs" repeats one internship listing
+            ids = {"internships": ["s-1", "s-2"], "jobs": ["s-2", "s-3"]}[category] if page == 1 else []
+            body = json.dumps({"data": {"data": [{"id": i, "title": category} for i in ids]}}).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/api"
+    
+    targets_path = "test_targets.json"
+    with open(targets_path, "w", encoding="utf-8") as f:
+        json.dump([
+            {"name": "internships", "url": base_url, "params": {"opportunity": "internships"}, "priority": 5},
+            {"name": "jobs", "url": base_url, "params": {"opportunity": "jobs"}, "concurrency": 2},
+        ], f)
+    test_db_path = "test_scheduler_internships.db"
+    if os.path.exists(test_db_path):
+        os.remove(test_db_path)
+    
+    config.RATE_LIMIT_PER_SECOND = 0
+    config.HTTP_CACHE_MODE = "off"
+    api_client._limiter = None
+    
+    try:
+        targets = scheduler.load_targets(targets_path)
+        assert [t.name for t in targets] == ["internships", "jobs"]
+        assert targets[1].concurrency == 2 and targets[0].url == base_url
+        
+        db = InternshipDB(test_db_path)
+        start = time.perf_counter()
+        totals = pipeline.store(scheduler.iter_records(targets, max_parallel=1), db)
+        sequential = time.perf_counter() - start
+        assert totals["items"] == 3 and totals["new"] == 3, totals
+        print("✅ Listings deduplicated across targets")
+        
+        titles = {r["unstop_id"]: r["title"] for r in db.iter_internships(["unstop_id", "title"])}
+        assert titles["s-2"] == "internships", titles
+        
+        start = time.perf_counter()
+        totals = pipeline.store(scheduler.iter_records(targets), db)
+        assert totals["new"] == 0, totals
+        assert time.perf_counter() - start < sequential
+        titles = {r["unstop_id"]: r["title"] for r in db.iter_internships(["unstop_id", "title"])}
+        assert titles == {"s-1": "internships", "s-2": "internships", "s-3": "jobs"}, titles
+        print("✅ Targets crawled concurrently; the higher-priority copy is kept")
+        db.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+        for path in (targets_path, test_db_path):
+            try:
+                os.remove(path)
+            except:
+                pass
+    
+    return True
+
+def test_pipeline():
+    """Test the streaming pipeline persists chunks as it goes"""
+    print("🧪 Testing Streaming Pipeline\n")
+    
+    import shutil
+    test_db_path = "test_pipeline_internships.db"
+    backup_dir = "test_pipeline_backup"
+    if os.path.exists(test_db_path):
+        os.remove(test_db_path)
+    shutil.rmtree(backup_dir, ignore_errors=True)
+    
+    db = InternshipDB(test_db_path)
+    
+    def pages():
+        yield 1, [{"id": f"new-{i}", "approved_date": "2099-01-01T00:00:00Z"} for i in range(5)]
+        yield 2, [{"id": "old-1", "approved_date": "2000-01-01T00:00:00Z"}]
+        raise RuntimeError("connection lost")
+    
+    import datetime
+    cutoff = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+    try:
+        with backup_store.SegmentStore(backup_dir, day="2026-01-01") as backup:
+            pipeline.run(pages(), db, backup=backup, cutoff=cutoff, chunk_size=2)
+    except RuntimeError:
+        pass
+    
+    # Two full chunks were committed before the crash; the old item was filtered
+    assert db.get_stats()["total_internships"] == 4
+    with backup_store.SegmentStore(backup_dir) as backup:
+        assert len(list(backup.snapshot("2026-01-01"))) == 4
+    print("✅ Completed chunks persisted before crash")
+    
+    db.close()
+    try:
+        os.remove(test_db_path)
+        shutil.rmtree(backup_dir)
+    except:
+        pass
+    
+    return True
+
+def test_crawl_state():
+    """Test crawl checkpoints, resume and high-water mark"""
+    print("🧪 Testing Crawl State\n")
+    
+    test_db_path = "test_crawl_internships.db"
+    if os.path.exists(test_db_path):
+        os.remove(test_db_path)
+    
+    db = InternshipDB(test_db_path)
+    
+    crawl = db.start_crawl()
+    db.checkpoint_crawl(crawl["run_id"], 7, "2026-01-02T00:00:00+00:00")
+    db.checkpoint_crawl(crawl["run_id"], 9, "2026-01-01T00:00:00+00:00")
+    
+    resumed = db.start_crawl(resume=True)
+    assert resumed["run_id"] == crawl["run_id"] and resumed["last_page"] == 9
+    assert resumed["high_water"] == "2026-01-02T00:00:00+00:00"
+    print("✅ Resume continues from last checkpoint")
+    
+    assert db.get_high_water() is None
+    db.finish_crawl(crawl["run_id"])
+    assert db.get_high_water() == "2026-01-02T00:00:00+00:00"
+    print("✅ High-water mark recorded on completion")
+    
+    fresh = db.start_crawl(resume=True)
+    assert fresh["run_id"] != crawl["run_id"] and fresh["last_page"] == 0
+    print("✅ Completed crawls are not resumed")
+    
+    import datetime
+    mark = datetime.datetime.fromisoformat(db.get_high_water())
+    items = [
+        {"id": "hw-new", "approved_date": "2026-01-03T00:00:00Z"},
+        {"id": "hw-same", "approved_date": "2026-01-02T00:00:00Z"},
+        {"id": "hw-old", "approved_date": "2026-01-01T00:00:00Z"},
+        {"id": "hw-after", "approved_date": "2026-01-05T00:00:00Z"},
+    ]
+    cutoff = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+    records = pipeline.iter_recent([(1, items)], cutoff, high_water=mark)
+    assert [r.item["id"] for r in records] == ["hw-new", "hw-same"]
+    print("✅ Listings at the high-water mark are kept, older ones stop the crawl")
+    
+    db.close()
+    try:
+        os.remove(test_db_path)
+    except:
+        pass
+    
+    return True
+
+def test_export_shards():
+    """Test incremental sharded web export"""
+    print("🧪 Testing Sharded Export\n")
+    
+    import shutil
+    test_db_path = "test_shards_internships.db"
+    output_dir = "test_shards_export"
+    if os.path.exists(test_db_path):
+        os.remove(test_db_path)
+    shutil.rmtree(output_dir, ignore_errors=True)
+    
+    db = InternshipDB(test_db_path)
+    db.add_internships([{"id": f"s-{i}", "title": f"Intern {i}"} for i in range(5)])
+    
+    assert db.export_shards(output_dir) == 5
+    with open(os.path.join(output_dir, "manifest.json"), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    shard_file = manifest["shards"][0]["file"]
+    shard_path = os.path.join(output_dir, "shards", shard_file)
+    assert os.path.exists(shard_path) and os.path.exists(shard_path + ".gz")
+    print(f"✅ Wrote {len(manifest['shards'])} shard(s) and manifest")
+    
+    mtime = os.path.getmtime(shard_path)
+    db.export_shards(output_dir)
+    assert os.path.getmtime(shard_path) == mtime
+    print("✅ Unchanged shards are not rewritten")
+    
+    db.add_internship({"id": "s-new", "title": "Newest"})
+    assert db.export_shards(output_dir) == 6
+    assert not os.path.exists(shard_path)
+    print("✅ Changed shard replaced and stale file removed")
+    
+    db.close()
+    try:
+        os.remove(test_db_path)
+        shutil.rmtree(output_dir)
+    except:
+        pass
+    
+    return True
+
+def test_export_columnar():
+    """Test the columnar web export with prebuilt sorts and facets"""
+    print("🧪 Testing Columnar Export\n")
+    
+    test_db_path = "test_columnar_internships.db"
+    output_path = "test_columnar_listings.json"
+    if os.path.exists(test_db_path):
+        os.remove(test_db_path)
+    
+    db = InternshipDB(test_db_path)
+    db.add_internships([
+        {"id": "col-0", "title": "A", "type": "job", "views_count": 5, "stipend": {"min": 1000}},
+        {"id": "col-1", "title": "B", "type": "internship", "is_work_from_home": True, "views_count": 50},
+        {"id": "col-2", "title": "C", "type": "job", "views_count": 20, "stipend": {"min": 2000, "max": 9000}},
+    ])
+    
+    assert db.export_columnar(output_path) == 3
+    with open(output_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    ids = data["columns"]["id"]
+    assert sorted(ids) == ["col-0", "col-1", "col-2"]
+    assert data["columns"]["stipendMax"][ids.index("col-2")] == 9000
+    assert [ids[row] for row in data["sorts"]["views"]] == ["col-1", "col-2", "col-0"]
+    assert [ids[row] for row in data["sorts"]["stipend-high"]] == ["col-2", "col-0", "col-1"]
+    assert sorted(ids[row] for row in data["facets"]["type"]["job"]) == ["col-0", "col-2"]
+    assert [ids[row] for row in data["facets"]["workFromHome"]] == ["col-1"]
+    print("✅ Columns, sort orders and facet row lists exported")
+    
+    db.close()
+    for path in (test_db_path, output_path, output_path + ".gz", output_path + ".br"):
+        try:
+            os.remove(path)
+        except:
+            pass
+    
+    return True
+
+def test_export_parquet():
+    """Test the month-partitioned Parquet analytics export"""
+    print("🧪 Testing Parquet Export\n")
+    
+    try:
+        import pyarrow.dataset
+    except ImportError:
+        print("⚠️  pyarrow not installed, skipping")
+        return True
+    
+    import shutil
+    import sqlite3
+    from contextlib import closing
+    test_db_path = "test_parquet_internships.db"
+    output_dir = "test_parquet_export"
+    if os.path.exists(test_db_path):
+        os.remove(test_db_path)
+    shutil.rmtree(output_dir, ignore_errors=True)
+    
+    db = InternshipDB(test_db_path)
+    db.add_internships([
+        {"id": f"pq-{i}", "title": f"Intern {i}", "stipend": {"min": 1000 * i},
+         "skills_required": [{"skill": "Python"}, {"skill": "SQL"}]}
+        for i in range(6)
+    ])
+    with closing(sqlite3.connect(test_db_path)) as conn:
+        conn.execute("UPDATE internships SET first_seen = '2025-06-15 10:00:00' WHERE unstop_id IN ('pq-0', 'pq-1')")
+        conn.commit()
+    
+    assert db.export_parquet(output_dir, batch_size=2) == 6
+    old_path = os.path.join(output_dir, "month=2025-06", "internships.parquet")
+    assert os.path.exists(old_path)
+    dataset = pyarrow.dataset.dataset(output_dir, format="parquet", partitioning="hive")
+    table = dataset.to_table(filter=pyarrow.dataset.field("month") == "2025-06")
+    assert sorted(table.column("unstop_id").to_pylist()) == ["pq-0", "pq-1"]
+    assert table.column("skills").to_pylist()[0] == ["Python", "SQL"]
+    assert dataset.count_rows() == 6
+    print("✅ Month partitions readable with predicate pushdown")
+    
+    mtime = os.path.getmtime(old_path)
+    db.add_internship({"id": "pq-new", "title": "Newest"})
+    assert db.export_parquet(output_dir) == 7
+    assert os.path.getmtime(old_path) == mtime
+    print("✅ Only changed months are rewritten")
+    
+    from src import database
+    with open(os.path.join(output_dir, "_manifest.json"), "r", encoding="utf-8") as f:
+        current = next(p["file"] for p in json.load(f)["partitions"] if p["key"] != "2025-06")
+    current_path = os.path.join(output_dir, current)
+    with open(current_path, "rb") as f:
+        before = f.read()
+    db.add_internship({"id": "pq-fail", "title": "Fails"})
+    original = database._analytics_table
+    def broken(rows, schema):
+        raise RuntimeError("disk full")
+    database._analytics_table = broken
+    try:
+        db.export_parquet(output_dir)
+        assert False, "export should fail"
+    except RuntimeError:
+        pass
+    finally:
+        database._analytics_table = original
+    with open(current_path, "rb") as f:
+        assert f.read() == before
+    assert not os.path.exists(current_path + ".tmp")
+    assert db.export_parquet(output_dir) == 8
+    print("✅ A failed write keeps the previous partition")
+    
+    db.close()
+    try:
+        os.remove(test_db_path)
+        shutil.rmtree(output_dir)
+    except:
+        pass
+    
+    return True
+
+def test_iter_internships():
+    """Test streaming reads with projection and keyset pagination"""
+    print("🧪 Testing Streaming Reads\n")
+    
+    test_db_path = "test_iter_internships.db"
+    if os.path.exists(test_db_path):
+        os.remove(test_db_path)
+    
+    db = InternshipDB(test_db_path)
+    db.add_internships([{"id": f"it-{i}", "title": f"Intern {i}"} for i in range(25)])
+    
+    rows = list(db.iter_internships(columns=["unstop_id"], batch_size=4))
+    assert len(rows) == 25 and "raw_data" not in rows[0]
+    assert set(rows[0]) == {"unstop_id", "scraped_at", "id"}
+    print("✅ Projection skips raw_data")
+    
+    seen = []
+    after = None
+    while True:
+        page = []
+        for row in db.iter_internships(columns=["unstop_id"], after=after):
+            page.append(row)
+            if len(page) == 10:
+                break
+        if not page:
+            break
+        seen.extend(row["unstop_id"] for row in page)
+        after = (page[-1]["scraped_at"], page[-1]["id"])
+    assert sorted(seen) == sorted(row["unstop_id"] for row in rows)
+    print("✅ Keyset pagination visits every row once")
+    
+    db.close()
+    try:
+        os.remove(test_db_path)
+    except:
+        pass
+    
+    return True
+
+def test_compressed_raw_data():
+    """Test compressed, deduplicated raw_data storage and migration"""
+    print("🧪 Testing Compressed raw_data\n")
+    
+    import sqlite3
+    from contextlib import closing
+    test_db_path = "test_raw_internships.db"
+    if os.path.exists(test_db_path):
+        os.remove(test_db_path)
+    
+    details = "<p>" + "Lots of HTML details. " * 200 + "</p>"
+    items = [{"id": f"raw-{i}", "title": "Intern", "details": details} for i in range(3)]
+    
+    # Start with inline storage, then reopen compressed to migrate
+    db = InternshipDB(test_db_path, raw_storage="inline")
+    db.add_internships(items)
+    db.compress_raw = True
+    
+    # An update in compressed mode must not leave the old inline payload behind
+    db.add_rows([db.normalize_item(dict(items[2], title="Updated"))], upsert=True)
+    row = next(r for r in db.get_all_internships() if r["unstop_id"] == "raw-2")
+    assert row["title"] == "Updated" and json.loads(row["raw_data"])["title"] == "Updated"
+    print("✅ Updated rows read their new payload")
+    
+    assert db.compact_raw_data() == 2
+    print("✅ Existing inline raw_data migrated")
+    
+    db.add_internship({"id": "raw-x", "title": "Intern", "details": details})
+    db.add_internship({"id": "raw-y", "title": "Intern", "details": details})
+    
+    with closing(sqlite3.connect(test_db_path)) as conn:
+        inline = conn.execute("SELECT COUNT(*) FROM internships WHERE raw_data IS NOT NULL").fetchone()[0]
+        payloads = conn.execute("SELECT COUNT(*) FROM raw_payloads").fetchone()[0]
+    assert inline == 0 and payloads == 5, (inline, payloads)
+    print("✅ No inline payloads left")
+    
+    rows = {row["unstop_id"]: row for row in db.get_all_internships()}
+    assert json.loads(rows["raw-1"]["raw_data"])["details"] == details
+    assert json.loads(rows["raw-y"]["raw_data"])["id"] == "raw-y"
+    print("✅ raw_data transparently decompressed on read")
+    
+    db.add_internships([items[0]])
+    with closing(sqlite3.connect(test_db_path)) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM raw_payloads").fetchone()[0] == 5
+    print("✅ Identical payloads stored once")
+    
+    for views in range(10):
+        db.add_rows([db.normalize_item({"id": "raw-x", "title": "Intern", "views_count": views})], upsert=True)
+    with closing(sqlite3.connect(test_db_path)) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM raw_payloads").fetchone()[0] == 5
+        assert conn.execute("SELECT COUNT(*) FROM internship_raw").fetchone()[0] == 5
+    print("✅ Replaced payloads deleted on update")
+    db.close()
+    
+    # Switching to compressed storage on an existing database migrates on open
+    db = InternshipDB(test_db_path, raw_storage="inline")
+    db.add_internship({"id": "raw-late", "title": "Inline", "details": "late"})
+    db.close()
+    db = InternshipDB(test_db_path, raw_storage="compressed")
+    with closing(sqlite3.connect(test_db_path)) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM internships WHERE raw_data IS NOT NULL").fetchone()[0] == 0
+    assert json.loads(next(r for r in db.get_all_internships() if r["unstop_id"] == "raw-late")["raw_data"])["details"] == "late"
+    print("✅ Inline rows compacted when compression is turned on later")
+    
+    db.close()
+    try:
+        os.remove(test_db_path)
+    except:
+        pass
+    
+    return True
+
+def test_search():
+    """Test FTS5 search and the static search index"""
+    print("🧪 Testing Full-Text Search\n")
+    
+    test_db_path = "test_search_internships.db"
+    index_path = "test_search_index.json"
+    if os.path.exists(test_db_path):
+        os.remove(test_db_path)
+    
+    db = InternshipDB(test_db_path)
+    db.add_internships([
+        {"id": "fts-1", "title": "Python Developer Intern", "organisation_name": "Snake Labs",
+         "is_work_from_home": True, "stipend": {"min": 20000, "max": 30000}},
+        {"id": "fts-2", "title": "Marketing Intern", "organisation_name": "Adverts",
+         "details": "<p>Some <b>Python</b> scripting is a plus</p>"},
+        {"id": "fts-3", "title": "Design Intern", "organisation_name": "Pixels"},
+    ])
+    db.add_internship({"id": "fts-4", "title": "Data Analyst", "skills_required": [{"skill": "Pandas"}]})
+    
+    results = [r["unstop_id"] for r in db.search("pyth")]
+    assert results == ["fts-1", "fts-2"], results
+    print("✅ Prefix search ranks title matches first")
+    
+    assert [r["unstop_id"] for r in db.search("python", {"work_from_home": True})] == ["fts-1"]
+    assert [r["unstop_id"] for r in db.search("python", {"min_stipend": 25000})] == ["fts-1"]
+    assert [r["unstop_id"] for r in db.search("pandas")] == ["fts-4"]
+    assert db.search('"; DROP') == []
+    print("✅ Filters applied and FTS syntax ignored")
+    
+    db.export_search_index(index_path)
+    with open(index_path, "r", encoding="utf-8") as f:
+        index = json.load(f)
+    assert [index["ids"][p] for p in index["terms"]["python"]] == ["fts-1"]
+    print("✅ Static search index exported")
+    
+    db.close()
+    try:
+        os.remove(test_db_path)
+        os.remove(index_path)
+    except:
+        pass
+    
+    return True
+
+def test_upsert():
+    """Test upserts refresh changed listings and keep stats history"""
+    print("🧪 Testing Upsert With Change Tracking\n")
+    
+    import sqlite3
+    from contextlib import closing
+    test_db_path = "test_upsert_internships.db"
+    if os.path.exists(test_db_path):
+        os.remove(test_db_path)
+    
+    db = InternshipDB(test_db_path)
+    item = {"id": "up-1", "title": "Backend Intern", "views_count": 10, "registrations_count": 1}
+    other = {"id": "up-2", "title": "Frontend Intern", "views_count": 5}
+    
+    counts = db.add_rows([db.normalize_item(item), db.normalize_item(other)], upsert=True)
+    assert counts == {"new": 2, "updated": 0, "duplicate": 0}, counts
+    
+    counts = db.add_rows([db.normalize_item(item), db.normalize_item(other)], upsert=True)
+    assert counts == {"new": 0, "updated": 0, "duplicate": 2}, counts
+    print("✅ Unchanged rows skipped")
+    
+    changed = dict(item, views_count=50, title="Backend Engineering Intern")
+    counts = db.add_rows([db.normalize_item(changed), db.normalize_item(other)], upsert=True)
+    assert counts == {"new": 0, "updated": 1, "duplicate": 1}, counts
+    
+    row = next(r for r in db.get_all_internships() if r["unstop_id"] == "up-1")
+    assert row["views"] == 50 and row["title"] == "Backend Engineering Intern"
+    assert json.loads(row["raw_data"])["views_count"] == 50
+    assert [r["unstop_id"] for r in db.search("engineering")] == ["up-1"]
+    print("✅ Changed row updated, raw_data and search index refreshed")
+    
+    detailed = dict(changed, details="<p>Feeds the zebra</p>", seo_url="backend-intern-2")
+    counts = db.add_rows([db.normalize_item(detailed)], upsert=True)
+    assert counts == {"new": 0, "updated": 1, "duplicate": 0}, counts
+    assert [r["unstop_id"] for r in db.search("zebra")] == ["up-1"]
+    row = next(r for r in db.get_all_internships() if r["unstop_id"] == "up-1")
+    assert json.loads(row["raw_data"])["seo_url"] == "backend-intern-2"
+    print("✅ Payload-only changes refresh the listing")
+    
+    history = db.get_snapshots("up-1")
+    assert [h["views"] for h in history][-1] == 50
+    with closing(sqlite3.connect(test_db_path)) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM internship_snapshots WHERE unstop_id = 'up-2'").fetchone()[0] == 1
+    print("✅ views/registrations history recorded")
+    
+    db.close()
+    try:
+        os.remove(test_db_path)
+    except:
+        pass
+    
+    return True
+
+def test_rollups():
+    """Test incrementally maintained stats rollups"""
+    print("🧪 Testing Stats Rollups\n")
+    
+    test_db_path = "test_rollups_internships.db"
+    if os.path.exists(test_db_path):
+        os.remove(test_db_path)
+    
+    db = InternshipDB(test_db_path)
+    db.add_internships([
+        {"id": "r-1", "organisation_name": "Acme", "is_work_from_home": True,
+         "stipend": {"min": 8000, "max": 12000}, "skills_required": [{"skill": "Python"}, {"skill": "SQL"}]},
+        {"id": "r-2", "organisation_name": "Acme", "skills_required": [{"skill": "Python"}]},
+        {"id": "r-3", "organisation_name": "Globex", "stipend": {"min": 3000}},
+    ])
+    
+    stats = db.get_stats(detailed=True)
+    assert stats["total_internships"] == 3 and stats["added_today"] == 3
+    assert stats["top_companies"] == {"Acme": 2, "Globex": 1}
+    assert stats["top_skills"] == {"Python": 2, "SQL": 1}
+    assert stats["stipend_histogram"] == {"0": 1, "0-4999": 1, "10000-14999": 1}
+    assert stats["work_from_home"] == 1
+    print("✅ Rollups maintained on ingest")
+    
+    db.add_rows([db.normalize_item({"id": "r-2", "organisation_name": "Initech"})], upsert=True)
+    assert db.get_stats(detailed=True)["top_companies"] == {"Acme": 1, "Globex": 1, "Initech": 1}
+    print("✅ Rollups follow updates")
+    
+    db.add_internships([
+        {"id": "r-4", "organisation_name": "Acme", "skills_required": [{"skill": "python"}, {"skill": "PYTHON"}]},
+    ])
+    assert db.get_stats(detailed=True)["top_skills"] == {"Python": 2, "SQL": 1}
+    assert len(db.query(skills=["Python"])) == 2
+    print("✅ Skill rollups fold case like the facet tables")
+    
+    expected = db.get_stats(detailed=True)
+    db.rebuild_rollups()
+    assert db.get_stats(detailed=True) == expected
+    print("✅ Rebuild matches incremental rollups")
+    
+    db.close()
+    try:
+        os.remove(test_db_path)
+    except:
+        pass
+    
+    return True
+
+def test_facets():
+    """Test normalized skill/location/company facets"""
+    print("🧪 Testing Faceted Queries\n")
+    
+    test_db_path = "test_facets_internships.db"
+    if os.path.exists(test_db_path):
+        os.remove(test_db_path)
+    
+    db = InternshipDB(test_db_path)
+    db.add_internships([
+        {"id": "f-1", "organisation_name": "Acme", "stipend": {"min": 10000},
+         "skills_required": [{"skill": "Python"}, {"skill": "SQL"}], "locations": [{"city": "Bangalore"}]},
+        {"id": "f-2", "organisation_name": "Globex", "is_work_from_home": True,
+         "skills_required": [{"skill": "Python"}], "locations": [{"city": "Mumbai"}, {"city": "Bangalore"}]},
+        {"id": "f-3", "organisation_name": "Acme", "skills_required": [{"skill": "Excel"}],
+         "locations": [{"city": "Pune"}]},
+    ])
+    
+    ids = lambda rows: sorted(r["unstop_id"] for r in rows)
+    assert ids(db.query(skills=["python"], locations=["Bangalore"])) == ["f-1", "f-2"]
+    assert ids(db.query(skills=["Python", "SQL"])) == ["f-1"]
+    assert ids(db.query(locations=["Pune", "Mumbai"])) == ["f-2", "f-3"]
+    assert ids(db.query(companies=["acme"], min_stipend=5000)) == ["f-1"]
+    assert ids(db.query(skills=["Python"], wfh=True)) == ["f-2"]
+    assert db.query(skills=["Rust"]) == []
+    print("✅ Facet filters resolved through junction tables")
+    
+    db.add_rows([db.normalize_item({"id": "f-3", "organisation_name": "Acme",
+                                    "skills_required": [{"skill": "Python"}]})], upsert=True)
+    assert ids(db.query(skills=["Python"])) == ["f-1", "f-2", "f-3"]
+    assert db.query(locations=["Pune"]) == []
+    print("✅ Links follow updates")
+    
+    facets = db.get_facets()
+    assert facets["skills"] == {"Python": 3, "SQL": 1}
+    assert facets["locations"] == {"Bangalore": 2, "Mumbai": 1}
+    assert facets["companies"] == {"Acme": 2, "Globex": 1}
+    print("✅ Facet counts precomputed")
+    
+    db.close()
+    try:
+        os.remove(test_db_path)
+    except:
+        pass
+    
+    return True
+
+def test_digest():
+    """Test the incremental WhatsApp digest"""
+    print("🧪 Testing WhatsApp Digest\n")
+    
+    test_db_path = "test_digest_internships.db"
+    if os.path.exists(test_db_path):
+        os.remove(test_db_path)
+    
+    db = InternshipDB(test_db_path)
+    db.add_internships([
+        {"id": f"w-{i}", "title": f"Role {i}", "details": "<p>Build &amp; ship <b>things</b></p>" * 20,
+         "seo_url": f"https://unstop.com/w-{i}", "filters": [{"name": "Undergraduate"}],
+         "jobDetail": {"min_salary": 5000, "max_salary": 8000, "currency": "fa-rupee"}}
+        for i in range(10)
+    ])
+    
+    messages, count, last_id = digest.build_digest(db, max_chars=1000)
+    assert count == 10 and len(messages) > 1
+    assert all(len(m) <= 1000 for m in messages)
+    assert messages[0].startswith("*Internship Updates - ") and f"(1/{len(messages)})" in messages[0]
+    assert "_Build & ship things Build" in messages[0] and "₹5000 - ₹8000" in messages[0]
+    print("✅ Digest split into messages within the length limit")
+    
+    db.set_digest_watermark(last_id)
+    db.add_internships([{"id": "w-new", "title": "Fresh Role"}])
+    messages, count, _ = digest.build_digest(db)
+    assert count == 1 and len(messages) == 1 and "Fresh Role" in messages[0]
+    print("✅ Only listings after the watermark are included")
+    
+    metrics.registry.reset()
+    messages, count, _ = digest.build_digest(db, since_id=0, max_chars=1000)
+    assert count == 11
+    assert metrics.registry.snapshot()["counters"]["digest.cache_hits"] == 11
+    print("✅ Cached entries reused on re-runs")
+    
+    db.close()
+    try:
+        os.remove(test_db_path)
+    except:
+        pass
+    
+    return True
+
+def test_backfill():
+    """Test re-importing JSON and NDJSON backups through the process pool"""
+    print("🧪 Testing Backfill\n")
+    
+    json_path = "test_backfill_2026-01-01.json"
+    ndjson_path = "test_backfill_2026-01-02.ndjson"
+    test_db_path = "test_backfill_internships.db"
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({"items": [{"id": f"b-{i}", "title": "Old"} for i in range(5)] + [{"title": "No ID"}]}, f)
+    with open(ndjson_path, "w", encoding="utf-8") as f:
+        for i in range(3, 8):
+            f.write(json.dumps({"id": f"b-{i}", "title": "New"}) + "\n")
+    if os.path.exists(test_db_path):
+        os.remove(test_db_path)
+    
+    try:
+        db = InternshipDB(test_db_path)
+        totals = backfill.backfill([json_path, ndjson_path], db, workers=2, chunk_size=2, upsert=True)
+        assert totals["files"] == 2 and totals["items"] == 11, totals
+        assert totals["new"] == 8 and totals["updated"] == 2 and totals["invalid"] == 1, totals
+        titles = {r["unstop_id"]: r["title"] for r in db.iter_internships(["unstop_id", "title"])}
+        assert titles["b-0"] == "Old" and titles["b-4"] == "New" and len(titles) == 8
+        print("✅ Backups normalized in worker processes and written in order")
+        
+        totals = backfill.backfill([ndjson_path], db, workers=1, upsert=True)
+        assert totals["duplicate"] == 5, totals
+        print("✅ Re-running a backfill leaves unchanged listings alone")
+        db.close()
+    finally:
+        for path in (json_path, ndjson_path, test_db_path):
+            try:
+                os.remove(path)
+            except:
+                pass
+    
+    return True
+
+def test_backup_store():
+    """Test deduplicated backup segments and day snapshots"""
+    print("🧪 Testing Backup Store\n")
+    
+    import shutil
+    store_dir = "test_backup_segments"
+    test_db_path = "test_backup_internships.db"
+    shutil.rmtree(store_dir, ignore_errors=True)
+    if os.path.exists(test_db_path):
+        os.remove(test_db_path)
+    
+    def entries(titles):
+        return [(f"bk-{i}", json.dumps({"id": f"bk-{i}", "title": title})) for i, title in enumerate(titles)]
+    
+    try:
+        with backup_store.SegmentStore(store_dir, day="2026-01-01") as store:
+            assert store.append(entries(["A", "B", "C"])) == 3
+            assert store.append(entries(["A", "B", "C"])) == 0
+        with backup_store.SegmentStore(store_dir, day="2026-01-02") as store:
+            assert store.append(entries(["A", "B2"])) == 1
+            assert store.days() == ["2026-01-01", "2026-01-02"]
+            day1 = [json.loads(line)["title"] for line in store.snapshot("2026-01-01")]
+            day2 = [json.loads(line)["title"] for line in store.snapshot("2026-01-02")]
+        assert sorted(day1) == ["A", "B", "C"] and sorted(day2) == ["A", "B2"], (day1, day2)
+        assert sorted(os.listdir(store_dir)) == ["2026-01-01.ndjson.gz", "2026-01-02.ndjson.gz", "index.db"]
+        print("✅ Unchanged payloads deduplicated, each day rebuilt from the index")
+        
+        db = InternshipDB(test_db_path)
+        paths = backfill.backup_files(store_dir, store_dir)
+        totals = backfill.backfill(paths, db, workers=1, upsert=True)
+        assert totals["new"] == 3 and totals["updated"] == 1, totals
+        assert {r["unstop_id"]: r["title"] for r in db.iter_internships(["unstop_id", "title"])}["bk-1"] == "B2"
+        print("✅ Segments backfilled in order")
+        db.close()
+    finally:
+        shutil.rmtree(store_dir, ignore_errors=True)
+        try:
+            os.remove(test_db_path)
+        except:
+            pass
+    
+    return True
+
+def test_metrics():
+    """Test run metrics snapshot and Prometheus output"""
+    print("🧪 Testing Run Metrics\n")
+    
+    registry = metrics.Metrics()
+    for seconds in (0.01, 0.02, 0.3):
+        registry.observe("http.request", seconds)
+    registry.incr("http.bytes", 3000)
+    with registry.timer("db.add_rows"):
+        registry.incr("db.rows_written", 10)
+    
+    snap = registry.snapshot()
+    assert snap["timers"]["http.request"]["count"] == 3
+    assert snap["timers"]["http.request"]["p50"] == 0.02
+    assert snap["timers"]["http.request"]["buckets"]["0.025"] == 2
+    assert snap["rates"]["http.bytes_per_second"] == round(3000 / 0.33, 1)
+    
+    registry.started -= 10
+    registry.incr("pipeline.items_seen", 50)
+    registry.observe("pipeline.date_parse", 0.001)
+    assert 4.9 <= registry.snapshot()["rates"]["pipeline.items_per_second"] <= 5.0
+    print("✅ Snapshot summarises timers and rates")
+    
+    prom_path = "test_metrics.prom"
+    registry.write_prometheus(prom_path)
+    with open(prom_path, "r", encoding="utf-8") as f:
+        text = f.read()
+    assert 'internship_scraper_http_request_seconds_bucket{le="+Inf"} 3' in text
+    assert "internship_scraper_http_bytes_total 3000" in text
+    print("✅ Prometheus textfile written")
+    
+    try:
+        os.remove(prom_path)
+    except:
+        pass
+    
+    return True
+
+def test_connections():
+    """Test connection reuse, pragmas, nested transactions and the v6 migration"""
+    print("🧪 Testing SQLite Connections\n")
+    
+    import sqlite3
+    from contextlib import closing
+    test_db_path = "test_connections_internships.db"
+    if os.path.exists(test_db_path):
+        os.remove(test_db_path)
+    
+    with closing(sqlite3.connect(test_db_path)) as conn:
+        conn.execute("PRAGMA journal_mode = DELETE")
+    db = InternshipDB(test_db_path)
+    with db._connect() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        with db._connect() as inner:
+            assert inner is conn
+    with db._connect() as again:
+        assert again is conn
+    other = []
+    def worker():
+        with db._connect() as conn:
+            other.append(conn)
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    assert other[0] is not conn
+    print("✅ One long-lived connection per thread, pragmas applied")
+    
+    try:
+        with db._connect():
+            db.set_digest_watermark(42)
+            raise RuntimeError("abort")
+    except RuntimeError:
+        pass
+    assert db.get_digest_watermark() == 0
+    print("✅ Nested writes roll back with the outermost block")
+    
+    db.add_internships([{"id": "conn-1"}, {"id": "conn-2"}])
+    for row in db.iter_internships(["unstop_id"], batch_size=1):
+        db.set_digest_watermark(row["id"])
+    assert db.get_digest_watermark() in (1, 2)
+    print("✅ Writes allowed while iterating")
+    db.close()
+    
+    # A version 5 database still has the redundant unstop_id index
+    with closing(sqlite3.connect(test_db_path)) as conn:
+        conn.execute("CREATE INDEX idx_unstop_id ON internships(unstop_id)")
+        conn.execute("PRAGMA user_version = 5")
+        conn.commit()
+    db = InternshipDB(test_db_path)
+    db.close()
+    with closing(sqlite3.connect(test_db_path)) as conn:
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert "idx_unstop_id" not in indexes
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == 7
+        assert "COLLATE NOCASE" in conn.execute("SELECT sql FROM sqlite_master WHERE name = 'rollups'").fetchone()[0]
+    print("✅ Version 6 and 7 migrations drop idx_unstop_id and fold rollup keys")
+    
+    try:
+        os.remove(test_db_path)
+    except:
+        pass
+    
+    return True
+
+def test_dates():
+    """Test cached timestamp parsing and epoch columns"""
+    print("🧪 Testing Date Parsing\n")
+    
+    assert dates.to_epoch("2024-01-01T00:00:00Z") == 1704067200
+    assert dates.to_epoch("2024-01-01T05:30:00+05:30") == 1704067200
+    assert dates.to_epoch("2024-01-01 00:00:00") == 1704067200
+    assert dates.to_epoch(1704067200) == 1704067200
+    # The fast path must agree with dateutil (month-first for slash dates)
+    import datetime
+    from dateutil import parser
+    for text in ("03/04/2026", "03/04/2026 10:00:00", "03-04-2026", "13/04/2026"):
+        assert dates.parse_timestamp(text) == parser.parse(text).replace(tzinfo=datetime.timezone.utc), text
+    assert dates.parse_timestamp("03/04/2026").month == 3
+    assert dates.parse_timestamp("") is None
+    assert dates.parse_timestamp("not a date") is None
+    print("✅ ISO, fixed-format and epoch values parsed as UTC")
+    
+    test_db_path = "test_dates_internships.db"
+    if os.path.exists(test_db_path):
+        os.remove(test_db_path)
+    
+    db = InternshipDB(test_db_path)
+    db.add_internship({"id": "d-1", "title": "Dated", "registration_end_date": "2024-01-01T00:00:00Z"})
+    row = next(db.iter_internships(["unstop_id", "deadline", "deadline_at", "start_at"]))
+    assert row["deadline"] == "2024-01-01T00:00:00Z"
+    assert row["deadline_at"] == 1704067200
+    assert row["start_at"] is None
+    print("✅ Epoch columns stored alongside the raw strings")
+    
+    db.close()
+    try:
+        os.remove(test_db_path)
+    except:
+        pass
+    
+    return True
+
 if __name__ == "__main__":
     try:
         test_database()
+        test_bulk_insert()
+        test_fetch_pages()
+        test_response_cache()
+        test_scheduler()
+        test_pipeline()
+        test_crawl_state()
+        test_export_shards()
+        test_export_columnar()
+        test_export_parquet()
+        test_iter_internships()
+        test_compressed_raw_data()
+        test_search()
+        test_upsert()
+        test_rollups()
+        test_facets()
+        test_digest()
+        test_backfill()
+        test_backup_store()
+        test_metrics()
+        test_connections()
+        test_dates()
     except Exception as e:
         print(f"\n❌ Test failed: {e}")
         import traceback